@@ -1,6 +1,17 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-from libre_translate_api import LibreTranslateAPI
+from libre_translate_api import LibreTranslateAPI, LibreTranslateTimeout
+from knowledge_store import KnowledgeStore
+from translation_cache import cache_from_env
+from translation_backends import backend_from_env
+from ocr_jobs import OCRJobQueue, QueueFull
+from ocr_pipeline import ocr_image, make_tile_executor
+from pdf_ingest import iter_pdf_pages, open_pdf
+from language_detect import LanguageDetector
+from segmenter import split_sentences, unwrap_lines
+from term_protection import translate_protected
+from metrics import Metrics, profiler_from_env
+import json
 import re
 import pytesseract
 from PIL import Image
@@ -8,112 +19,197 @@ import os
 import time
 import requests
 import math # Added for distance calculation
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # NOTE: The Tesseract code is now restored. For a real application,
 # you must have Tesseract installed on your system and provide the
 # correct path below. If the path is not set correctly, this will fail.
 
 # Uncomment this line and set your local Tesseract path
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+# (TESSERACT_CMD overrides it, e.g. for stub_tesseract in benchmarks)
+pytesseract.pytesseract.tesseract_cmd = os.environ.get("TESSERACT_CMD", r'C:\Program Files\Tesseract-OCR\tesseract.exe')
 
 app = Flask(__name__)
 CORS(app)
 
+# Request and stage histograms, upstream error counters, served at /metrics.
+# PROFILE_SAMPLE_RATE=0.01 profiles 1% of requests (see metrics.RequestProfiler).
+metrics = Metrics()
+request_profiler = profiler_from_env()
+
+# Preprocess and tile scans before OCR (see ocr_pipeline); OCR_PREPROCESS=0
+# sends the raw upload to Tesseract as before.
+OCR_PREPROCESS = os.environ.get("OCR_PREPROCESS", "1") != "0"
+ocr_tile_executor = make_tile_executor(os.cpu_count() or 1)
+
+# Page workers for /process_pdf: OCR of scanned pages plus optional translation
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "200"))
+pdf_page_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="pdf-page")
+
+# Background OCR workers for /process_image/jobs (one process per core by default);
+# pollers may long-poll for up to OCR_MAX_WAIT seconds.
+OCR_MAX_WAIT = 30
+ocr_jobs = OCRJobQueue(
+    max_workers=int(os.environ.get("OCR_WORKERS", "0")) or None,
+    max_pending=int(os.environ.get("OCR_MAX_PENDING", "0")) or None,
+    tesseract_cmd=pytesseract.pytesseract.tesseract_cmd,
+    preprocess=OCR_PREPROCESS,
+)
+
+# Shared pool for /translate/batch fan-out; the LibreTranslateAPI connection
+# pool is sized to match so workers don't queue for sockets.
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", "8"))
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "200"))
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix="mt-batch")
+
 # Connect to your local LibreTranslate server
-lt = LibreTranslateAPI("http://localhost:5000")
-
-# --- Expanded Medical Glossary with all languages ---
-medical_glossary = {
-    "fever": {"en": "fever", "hi": "बुखार", "es": "fiebre", "de": "Fieber", "fr": "fièvre", "ar": "حمى", "bn": "জ্বর", "zh": "发烧", "ja": "熱", "ko": "열", "ru": "лихорадка", "pt": "febre", "it": "febbre", "nl": "koorts", "tr": "ateş", "pl": "gorączka", "sv": "feber"},
-    "cancer": {"en": "cancer", "hi": "कैंसर", "es": "cáncer", "de": "Krebs", "fr": "cancer", "ar": "سرطان", "bn": "ক্যান্সার", "zh": "癌症", "ja": "癌", "ko": "암", "ru": "рак", "pt": "câncer", "it": "cancro", "nl": "kanker", "tr": "kanser", "pl": "rak", "sv": "cancer"},
-    "headache": {"en": "headache", "hi": "सिरदर्द", "es": "dolor de cabeza", "de": "Kopfschmerzen", "fr": "mal de tête", "ar": "صداع", "bn": "মাথাব্যথা", "zh": "头晕", "ja": "頭痛", "ko": "두통", "ru": "головная боль", "pt": "dor de cabeça", "it": "mal di testa", "nl": "hoofdpijn", "tr": "baş ağrıısı", "pl": "ból głowy", "sv": "huvudvärk"},
-    "diabetes": {"en": "diabetes", "hi": "मधुमेह", "es": "diabetes", "de": "Diabetes", "fr": "diabète", "ar": "سكري", "bn": "ডায়াবেটিস", "zh": "糖尿病", "ja": "糖尿病", "ko": "당뇨병", "ru": "диабет", "pt": "diabetes", "it": "diabete", "nl": "diabetes", "tr": "diyabet", "pl": "cukrzyca", "sv": "diabetes"},
-    "asthma": {"en": "asthma", "hi": "दमा", "es": "asma", "de": "Asthma", "fr": "asthme", "ar": "ربو", "bn": "হাঁপানি", "zh": "哮喘", "ja": "喘息", "ko": "천식", "ru": "астма", "pt": "asma", "it": "asma", "nl": "astma", "tr": "astım", "pl": "astma", "sv": "astma"},
-    "fracture": {"en": "fracture", "hi": "फ्रैक्चर", "es": "fractura", "de": "Fraktur", "fr": "fracture", "ar": "كسر", "bn": "ফ্র্যাকচার", "zh": "骨折", "ja": "骨折", "ko": "골절", "ru": "перелом", "pt": "fratura", "it": "frattura", "nl": "fractuur", "tr": "kırık", "pl": "złamanie", "sv": "fraktur"},
-    "infection": {"en": "infection", "hi": "संक्रमण", "es": "infección", "de": "Infektion", "fr": "infection", "ar": "عدوى", "bn": "সংক্রমণ", "zh": "感染", "ja": "感染症", "ko": "감염", "ru": "инфекция", "pt": "infecção", "it": "infezione", "nl": "infectie", "tr": "enfeksiyon", "pl": "infekcja", "sv": "infektion"},
-    "pain": {"en": "pain", "hi": "दर्द", "es": "dolor", "de": "Schmerz", "fr": "douleur", "ar": "ألم", "bn": "ব্যথা", "zh": "痛", "ja": "痛み", "ko": "통증", "ru": "боль", "pt": "dor", "it": "dolore", "nl": "pijn", "tr": "ağrı", "pl": "ból", "sv": "smärta"},
-    "vomiting": {"en": "vomiting", "hi": "उल्टी", "es": "vómito", "de": "Erbrechen", "fr": "vomissement", "ar": "قيء", "bn": "বমি", "zh": "呕吐", "ja": "嘔吐", "ko": "구토", "ru": "рвота", "pt": "vômito", "it": "vomito", "nl": "braken", "tr": "kusma", "pl": "wymioty", "sv": "kräkningar"},
-    "cough": {"en": "cough", "hi": "खांसी", "es": "tos", "de": "Husten", "fr": "toux", "ar": "سعال", "bn": "কাশি", "zh": "咳嗽", "ja": "咳", "ko": "기침", "ru": "кашель", "pt": "tosse", "it": "tosse", "nl": "hoest", "tr": "öksürük", "pl": "kaszel", "sv": "hosta"},
-    "nausea": {"en": "nausea", "hi": "मतली", "es": "náusea", "de": "Übelkeit", "fr": "nausée", "ar": "غثيان", "bn": "বমি বমি ভাব", "zh": "头晕", "ja": "吐き気", "ko": "메스꺼움", "ru": "тошнота", "pt": "náusea", "it": "nausea", "nl": "misselijkheid", "tr": "mide bulantısı", "pl": "mdłości", "sv": "illamående"},
-    "dizziness": {"en": "dizziness", "hi": "चक्कर", "es": "mareo", "de": "Schwindel", "fr": "vertige", "ar": "دوخة", "bn": "মাথা ঘোরা", "zh": "头晕", "ja": "めまい", "ko": "현기증", "ru": "головокружение", "pt": "tontura", "it": "vertigini", "nl": "duizeligheid", "tr": "baş dönmesi", "pl": "zawroty głowy", "sv": "yrsel"},
-    "stroke": {"en": "stroke", "hi": "स्ट्रोक", "es": "derrame cerebral", "de": "Schlaganfall", "fr": "AVC", "ar": "سكتة دماغية", "bn": "স্ট্রোক", "zh": "中风", "ja": "脳卒中", "ko": "뇌졸증", "ru": "инсульт", "pt": "AVC", "it": "ictus", "nl": "beroerte", "tr": "inme", "pl": "udar", "sv": "stroke"},
-    "heart attack": {"en": "heart attack", "hi": "दिल का दौरा", "es": "ataque al corazón", "de": "Herzinfarkt", "fr": "crise cardiaque", "ar": "نوبة قلبية", "bn": "হার্ট অ্যাটাক", "zh": "心脏病发作", "ja": "心臓発作", "ko": "심장 मাবি", "ru": "сердечный приступ", "pt": "ataque cardíaco", "it": "infarto", "nl": "hartaanval", "tr": "kalp krizi", "pl": "zawał serca", "sv": "hjärtattack"},
-    "allergy": {"en": "allergy", "hi": "एलर्जी", "es": "alergia", "de": "Allergie", "fr": "allergie", "ar": "حساسية", "bn": "অ্যালার্জি", "zh": "过敏", "ja": "アレルギー", "ko": "알레르기", "ru": "аллергия", "pt": "alergia", "it": "allergia", "nl": "allergie", "tr": "alerji", "pl": "alergia", "sv": "allergi"},
-    "blood pressure": {"en": "blood pressure", "hi": "रक्तचाप", "es": "presión arterial", "de": "Blutdruck", "fr": "pression artérielle", "ar": "ضغط الدم", "bn": "রক্তচাপ", "zh": "血压", "ja": "血圧", "ko": "혈압", "ru": "кровяное давление", "pt": "pressão arterial", "it": "pressione sanguigna", "nl": "bloeddruk", "tr": "tansiyon", "pl": "ciśnienie krwi", "sv": "blodtryck"},
-    "surgery": {"en": "surgery", "hi": "सर्जरी", "es": "cirugía", "de": "Operation", "fr": "chirurgie", "ar": "جراحة", "bn": "অস্ত্রোপচার", "zh": "手术", "ja": "手術", "ko": "수술", "ru": "хирургия", "pt": "cirurgia", "it": "chirurgia", "nl": "operatie", "tr": "cerrahi", "pl": "operacja", "sv": "kirurgi"},
-    "vaccine": {"en": "vaccine", "hi": "टीका", "es": "vacuna", "de": "Impfstoff", "fr": "vaccin", "ar": "لقاح", "bn": "টিকা", "zh": "疫苗", "ja": "ワクチン", "ko": "백신", "ru": "вакцина", "pt": "vacina", "it": "vaccino", "nl": "vaccin", "tr": "aşı", "pl": "szczepionka", "sv": "vaccin"},
-    "prescription": {"en": "prescription", "hi": "नुस्खा", "es": "receta", "de": "Rezept", "fr": "ordonnance", "ar": "وصفة طبية", "bn": "প্রেসক্রিপশন", "zh": "处方", "ja": "処方箋", "ko": "처방전", "ru": "рецепт", "pt": "prescrição", "it": "prescrizione", "nl": "recept", "tr": "reçete", "pl": "recepta", "sv": "recept"},
-    "medicine": {"en": "medicine", "hi": "দવા", "es": "medicina", "de": "Medizin", "fr": "médicament", "ar": "দواء", "bn": "ঔষধ", "zh": "药", "ja": "薬", "ko": "약", "ru": "лекарство", "pt": "remédio", "it": "medicina", "nl": "medicijn", "tr": "ilaç", "pl": "lekarstwo", "sv": "medicin"},
-    "doctor": {"en": "doctor", "hi": "डॉक्टर", "es": "médico", "de": "Arzt", "fr": "médecin", "ar": "طبيب", "bn": "ডাক্তার", "zh": "医生", "ja": "医者", "ko": "의사", "ru": "врач", "pt": "médico", "it": "dottore", "nl": "dokter", "tr": "doktor", "pl": "lekarz", "sv": "läkare"},
-    "nurse": {"en": "nurse", "hi": "নर्स", "es": "enfermera", "de": "Krankenschwester", "fr": "infirmière", "ar": "ممرضة", "bn": "নার্স", "zh": "护士", "ja": "看護師", "ko": "간호사", "ru": "медсестра", "pt": "enfermeira", "it": "infermiera", "nl": "verpleegkundige", "tr": "hemşire", "pl": "pielęgniarka", "sv": "sjuksköterska"},
-    "hospital": {"en": "hospital", "hi": "अस्पताल", "es": "hospital", "de": "Krankenhaus", "fr": "hôpital", "ar": "مستشفى", "bn": "হাসপাতাল", "zh": "医院", "ja": "病院", "ko": "병원", "ru": "больница", "pt": "hospital", "it": "ospedale", "nl": "ziekenhuis", "tr": "hastane", "pl": "szpital", "sv": "sjukhus"},
-    "pharmacy": {"en": "pharmacy", "hi": "ফಾರ್মেসি", "es": "farmacia", "de": "Apotheke", "fr": "pharmacie", "ar": "صيدلية", "bn": "ফার্মেসি", "zh": "药店", "ja": "薬局", "ko": "약국", "ru": "аптека", "pt": "farmácia", "it": "farmacia", "nl": "apotheek", "tr": "eczane", "pl": "apteka", "sv": "apotek"},
-    "ambulance": {"en": "ambulance", "hi": "এम्बুলেন্স", "es": "ambulancia", "de": "Krankenwagen", "fr": "ambulance", "ar": "سياره اسعاف", "bn": "অ্যাম্বুলেন্স", "zh": "救护车", "ja": "救急車", "ko": "구급차", "ru": "скорая помощь", "pt": "ambulância", "it": "ambulanza", "nl": "ambulance", "tr": "ambulans", "pl": "karetka", "sv": "ambulans"},
-}
-
-# --- Symptom to Department Mapping ---
-symptom_to_department = {
-    "fever": ["General Medicine"],
-    "headache": ["Neurology", "General Medicine"],
-    "cough": ["Pulmonology", "General Medicine"],
-    "pain": ["General Medicine", "Orthopedics"],
-    "fracture": ["Orthopedics", "Emergency"],
-    "dizziness": ["Neurology", "ENT"],
-    "nausea": ["Gastroenterology"],
-    "vomiting": ["Gastroenterology", "Emergency"],
-    "heart attack": ["Cardiology", "Emergency"],
-    "stroke": ["Neurology", "Emergency"],
-    "cancer": ["Oncology"],
-    "diabetes": ["Endocrinology"],
-    "asthma": ["Pulmonology"],
-    "allergy": ["Allergy & Immunology"],
-    "infection": ["Infectious Disease", "General Medicine"],
-    "blood pressure": ["Cardiology", "General Medicine"],
-}
-
-department_translations = {
-    "General Medicine": {"en": "General Medicine", "hi": "सामान्य चिकित्सा", "es": "Medicina General", "de": "Allgemeinmedizin"},
-    "Neurology": {"en": "Neurology", "hi": "तंत्रिका-বিজ্ঞান", "es": "Neurología", "de": "Neurologie"},
-    "Pulmonology": {"en": "Pulmonology", "hi": "फेफড়া বিজ্ঞান", "es": "Neumología", "de": "Pneumologie"},
-    "Orthopedics": {"en": "Orthopedics", "hi": "हड्डी रोग", "es": "Ortopedia", "de": "Orthopädie"},
-    "Emergency": {"en": "Emergency", "hi": "आपातकालीन", "es": "Emergencia", "de": "Notaufnahme"},
-    "Gastroenterology": {"en": "Gastroenterology", "hi": "জठरांत्र विज्ञान", "es": "Gastroenterología", "de": "Gastroenterologie"},
-    "ENT": {"en": "ENT", "hi": "ईएनटी", "es": "Otorrinolaringología", "de": "HNO"},
-    "Cardiology": {"en": "Cardiology", "hi": "হৃदय রোগ বিজ্ঞান", "es": "Cardiología", "de": "Kardiologie"},
-    "Oncology": {"en": "Oncology", "hi": "ক্যান্সার বিজ্ঞান", "es": "Oncología", "de": "Onkologie"},
-    "Endocrinology": {"en": "Endocrinology", "hi": "অন্তঃस्त्राবिका", "es": "Endocrinología", "de": "Endokrinologie"},
-    "Allergy & Immunology": {"en": "Allergy & Immunology", "hi": "एलर्जी এবং इम्यूनोलॉजी", "es": "Alergia e Inmunología", "de": "Allergologie und Immunologie"},
-    "Infectious Disease": {"en": "Infectious Disease", "hi": "সংক্রামক রোগ", "es": "Enfermedades Infecciosas", "de": "Infektionskrankheiten"},
-}
-
-# --- Keyword to Visual Aid Mapping ---
-keyword_to_visual = {
-    "headache": "http://localhost:5001/static/images/headache.jpg",
-    "fever": "https://i.imgur.com/sC207aF.png",
-    "cough": "https://i.imgur.com/JOLi9i6.png",
-    "heart attack": "https://i.imgur.com/wS3gD3R.png",
-    "stroke": "https://i.imgur.com/c3eLg6E.png",
-    "fracture": "https://i.imgur.com/sXvjX3f.png",
-    "pain": "https://i.imgur.com/Y3hI8fD.png",
-    "stomach": "https://i.imgur.com/Y3hI8fD.png", 
-}
+LIBRETRANSLATE_URL = os.environ.get("LIBRETRANSLATE_URL", "http://localhost:5000")
+lt = LibreTranslateAPI(LIBRETRANSLATE_URL, pool_size=BATCH_MAX_WORKERS)
+
+# Machine translation goes through the backend chosen by TRANSLATION_BACKEND:
+# the LibreTranslate server above (default) or in-process Argos models.
+translation_backend = backend_from_env(lt)
+
+# Translation cache in front of the backend (see translation_cache.cache_from_env)
+translation_cache = cache_from_env(translation_backend.model_version)
+
+# Keep glossary terms as their glossary translations through MT (see
+# term_protection); GLOSSARY_PROTECTION=0 sends the text to MT untouched.
+GLOSSARY_PROTECTION = os.environ.get("GLOSSARY_PROTECTION", "1") != "0"
+
+def upstream_error_kind(error):
+    return "timeout" if isinstance(error, (LibreTranslateTimeout, TimeoutError)) else "error"
+
+def translate_cached(route, text, source_lang, target_lang):
+    """
+    translation_cache.translate through the backend, timing the MT call as
+    the "mt" stage and counting failures. Glossary terms are protected, and
+    the cache entry is tied to the glossary it was protected with.
+    Returns (translation, hit).
+    """
+    pair = pair_label(source_lang, target_lang)
+
+    def timed_translate(q, source, target):
+        try:
+            with metrics.stage(route, "mt", pair):
+                return translation_backend.translate(q, source=source, target=target)
+        except Exception as e:
+            metrics.upstream_errors.inc(service="mt", kind=upstream_error_kind(e))
+            raise
+
+    if not GLOSSARY_PROTECTION:
+        return translation_cache.translate(timed_translate, text, source_lang, target_lang)
+
+    index = knowledge.current()
+
+    def protected_translate(q, source, target):
+        return translate_protected(timed_translate, q, source, target, index)
+
+    return translation_cache.translate(protected_translate, text, source_lang, target_lang,
+                                       variant=f"glossary-{index.digest}")
+
+# --- Medical knowledge: glossary, departments and visual aids ---
+# Compiled from medical_knowledge.json into a memory-mapped index shared by
+# all workers; edits to the JSON are picked up without a restart.
+knowledge = KnowledgeStore()
 
 def find_medical_keywords(text, source_lang):
     """
     Finds medical terms in the text and returns their English equivalents.
     """
-    found_keywords = []
-    lower_text = " " + text.lower() + " "
-    sorted_glossary = sorted(medical_glossary.items(), key=lambda item: len(item[0]), reverse=True)
-    
-    for english_term, translations in sorted_glossary:
-        if source_lang in translations:
-            term_to_find = " " + translations[source_lang].lower() + " "
-            if term_to_find in lower_text:
-                found_keywords.append(english_term)
-                lower_text = lower_text.replace(term_to_find, " ")
+    matcher = knowledge.current().matcher(source_lang)
+    if matcher is None:
+        return []
+    return matcher.keys(text)
+
+def annotate_keywords(keywords_in_english, target_lang):
+    """
+    Builds the glossary terms, department recommendations and visual aid
+    for the target language from the English keywords found in the source.
+    """
+    return knowledge.current().annotate(tuple(keywords_in_english), target_lang)
+
+def pick_detected_language(detected_data):
+    """Returns (language, confidence); confidence is 0 for the "en" fallback."""
+    if detected_data and detected_data[0]['confidence'] > 30:
+        return detected_data[0]['language'], detected_data[0]['confidence']
+    return "en", 0
+
+def remote_detect(text):
+    # The Argos backend has no detector, so ambiguous text falls back to "en".
+    try:
+        with metrics.stage("/detect", "detect_remote"):
+            return pick_detected_language(translation_backend.detect(text))
+    except Exception as e:
+        metrics.upstream_errors.inc(service="detect", kind=upstream_error_kind(e))
+        raise
+
+# Answers /detect locally when the script or glossary is conclusive, and
+# only calls LibreTranslate for ambiguous text (see language_detect).
+language_detector = LanguageDetector(remote_detect, lambda: knowledge.current().matchers)
+
+def translated_result(route, text, source_lang, target_lang):
+    """Glossary match, MT and annotation for one text, each timed as a stage."""
+    pair = pair_label(source_lang, target_lang)
+    with metrics.stage(route, "glossary", pair):
+        keywords_in_english = find_medical_keywords(text, source_lang)
+    translated_text, cache_hit = translate_cached(route, text, source_lang, target_lang)
+    with metrics.stage(route, "annotate", pair):
+        annotations = annotate_keywords(keywords_in_english, target_lang)
+    return {
+        "translatedText": translated_text,
+        **annotations,
+        "cache": "hit" if cache_hit else "miss"
+    }
+
+# --- Metrics ---
+# Request durations cover building the response; streamed bodies record
+# their full duration as the "stream" stage.
+
+def route_label():
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+def pair_label(source_lang, target_lang):
+    """Pair label for metrics; codes outside the glossary languages become "other"."""
+    known = knowledge.current().languages
+    return "-".join(lang if lang in known else "other" for lang in (source_lang, target_lang))
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    g.metrics_pair = "-"
+    g.profiler = request_profiler.start(forced=request.headers.get("X-Profile") == "1")
 
-    return list(set(found_keywords))
+@app.after_request
+def record_request_metrics(response):
+    if hasattr(g, "metrics_started"):
+        metrics.requests.observe(time.perf_counter() - g.metrics_started, route=route_label(),
+                                 method=request.method, status=response.status_code, pair=g.metrics_pair)
+    return response
+
+@app.teardown_request
+def finish_request_profile(exc):
+    # Runs after error handlers and streamed bodies too, so the profiler
+    # is always switched off.
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        request_profiler.finish(profiler, route_label().strip("/").replace("/", "_").replace("<", "").replace(">", "") or "root")
+
+def record_ocr_timings(route, ocr_info):
+    if ocr_info and ocr_info.get("timings"):
+        metrics.observe_stages(route, {("recognise" if stage == "ocr" else stage): ms
+                                       for stage, ms in ocr_info["timings"].items()}, prefix="ocr_")
+
+metrics.add_gauges("translation_cache", "Translation cache counters and sizes.", lambda: {
+    key: value for key, value in translation_cache.stats().items() if key != "ttl"})
+metrics.add_gauges("language_detect", "Language detection counters by path.", language_detector.stats)
+metrics.add_gauges("ocr_jobs", "Background OCR queue state.", ocr_jobs.stats)
+metrics.add_gauges("translation_backend", "Translation backend counters.", translation_backend.stats)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_route():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 @app.route('/detect', methods=['POST'])
 def detect_language_route():
@@ -122,16 +218,21 @@ def detect_language_route():
         return jsonify({"error": "No text provided"}), 400
     
     text_to_detect = data.get('text')
+    # Clients typing into one box pass a session id so growing prefixes
+    # can reuse the earlier answer; without one every call stands alone.
+    session = data.get('session')
     try:
-        detected_data = lt.detect(text_to_detect)
-        if detected_data and detected_data[0]['confidence'] > 30: 
-            lang_code = detected_data[0]['language']
-            return jsonify({"language": lang_code})
-        return jsonify({"language": "en"}) 
+        with metrics.stage("/detect", "detect"):
+            lang_code, via = language_detector.detect(text_to_detect, session=session)
+        return jsonify({"language": lang_code, "via": via})
     except Exception as e:
         print(f"Detection error: {e}")
         return jsonify({"error": "Language detection failed"}), 500
 
+@app.route('/detect/stats', methods=['GET'])
+def detect_stats():
+    return jsonify(language_detector.stats())
+
 @app.route('/translate', methods=['POST'])
 def translate_text():
     data = request.get_json()
@@ -142,55 +243,178 @@ def translate_text():
     source_lang = data.get('source', 'en')
     target_lang = data.get('target', 'es')
 
+    g.metrics_pair = pair_label(source_lang, target_lang)
+
     if not text_to_translate:
-        return jsonify({"translatedText": "", "keywords": [], "recommendations": [], "visualAid": None})
+        return jsonify({"translatedText": "", "keywords": [], "recommendations": [], "visualAid": None, "cache": "miss"})
 
     try:
-        keywords_in_english = find_medical_keywords(text_to_translate, source_lang)
-        translated_text = lt.translate(text_to_translate, source=source_lang, target=target_lang)
-        
-        keywords_data = []
-        if keywords_in_english:
-            for english_keyword in keywords_in_english:
-                if target_lang in medical_glossary.get(english_keyword, {}):
-                    translated_term = medical_glossary[english_keyword][target_lang]
-                    keywords_data.append({
-                        "term": translated_term,
-                        "english": english_keyword
-                    })
-        
-        recommendations = []
-        if keywords_in_english:
-            departments = set()
-            for keyword in keywords_in_english:
-                if keyword in symptom_to_department:
-                    for dept in symptom_to_department[keyword]:
-                        departments.add(dept)
-            
-            for dept in departments:
-                if target_lang in department_translations.get(dept, {}):
-                    recommendations.append(department_translations[dept][target_lang])
-
-        visual_aid_url = None
-        if keywords_in_english:
-            for keyword in keywords_in_english:
-                if keyword in keyword_to_visual:
-                    visual_aid_url = keyword_to_visual[keyword]
-                    break # Show the first relevant image found
-
-        unique_keywords_data = [dict(t) for t in {tuple(d.items()) for d in keywords_data}]
-
-        return jsonify({
-            "translatedText": translated_text,
-            "keywords": unique_keywords_data,
-            "recommendations": recommendations,
-            "visualAid": visual_aid_url
-        })
+        result = translated_result("/translate", text_to_translate, source_lang, target_lang)
+        with metrics.stage("/translate", "response", g.metrics_pair):
+            return jsonify(result)
 
     except Exception as e:
         print(f"Translation error: {e}")
         return jsonify({"error": "Translation service failed."}), 500
 
+@app.route('/translate/batch', methods=['POST'])
+def translate_batch():
+    """
+    Translates every text into every target with the MT calls running
+    concurrently. Keyword extraction runs once per source text.
+    """
+    data = request.get_json()
+    if data is None:
+        return jsonify({"error": "No JSON payload found"}), 400
+
+    texts = data.get('texts')
+    targets = data.get('targets')
+    source_lang = data.get('source', 'en')
+    if isinstance(texts, str):
+        texts = [texts]
+    if isinstance(targets, str):
+        targets = [targets]
+    if not isinstance(texts, list) or not isinstance(targets, list) or not targets:
+        return jsonify({"error": "Provide 'texts' and 'targets' lists"}), 400
+    if not all(isinstance(text, str) for text in texts) or not all(isinstance(t, str) and t for t in targets):
+        return jsonify({"error": "'texts' and 'targets' must contain only strings"}), 400
+    if len(texts) * len(targets) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"Batch too large (max {BATCH_MAX_ITEMS} text/target pairs)"}), 400
+
+    with metrics.stage("/translate/batch", "glossary"):
+        keywords_per_text = [find_medical_keywords(text, source_lang) if text else [] for text in texts]
+
+    def translate_one(text, target_lang):
+        if not text:
+            return "", False
+        return translate_cached("/translate/batch", text, source_lang, target_lang)
+
+    futures = {
+        (i, target_lang): batch_executor.submit(translate_one, text, target_lang)
+        for i, text in enumerate(texts)
+        for target_lang in targets
+    }
+
+    # Wait for every MT call first, so the "response" stage only times
+    # building the annotations and the JSON body.
+    outcomes = {}
+    for (i, target_lang), future in futures.items():
+        try:
+            outcomes[(i, target_lang)] = future.result()
+        except Exception as e:
+            print(f"Batch translation error ({source_lang}->{target_lang}): {e}")
+            outcomes[(i, target_lang)] = None
+
+    with metrics.stage("/translate/batch", "response"):
+        results = []
+        for i, text in enumerate(texts):
+            translations = {}
+            for target_lang in targets:
+                outcome = outcomes[(i, target_lang)]
+                if outcome is None:
+                    translations[target_lang] = {"error": "Translation service failed."}
+                    continue
+                translated_text, cache_hit = outcome
+                translations[target_lang] = {
+                    "translatedText": translated_text,
+                    **annotate_keywords(keywords_per_text[i], target_lang),
+                    "cache": "hit" if cache_hit else "miss"
+                }
+            results.append({"text": text, "translations": translations})
+        return jsonify({"source": source_lang, "results": results})
+
+@app.route('/translate/stream', methods=['POST'])
+def translate_stream():
+    """
+    Splits the text into sentences, translates them concurrently and
+    streams one JSON line per sentence, in order, as soon as each is
+    ready. Sentences seen before are served from the translation cache, so
+    editing one line of a long text only re-translates that line.
+    """
+    data = request.get_json()
+    if data is None:
+        return jsonify({"error": "No JSON payload found"}), 400
+
+    text_to_translate = data.get('text') or ""
+    source_lang = data.get('source', 'en')
+    target_lang = data.get('target', 'es')
+    if not all(isinstance(value, str) for value in (text_to_translate, source_lang, target_lang)):
+        return jsonify({"error": "'text', 'source' and 'target' must be strings"}), 400
+    pair = g.metrics_pair = pair_label(source_lang, target_lang)
+    with metrics.stage("/translate/stream", "segment", pair):
+        segments = split_sentences(text_to_translate)
+
+    def translate_segment(segment):
+        sentence = unwrap_lines(segment)
+        if not sentence:
+            # Nothing to translate: neither a cache hit nor a miss.
+            return {"translatedText": "", **annotate_keywords([], target_lang), "cache": "skipped"}
+        return translated_result("/translate/stream", sentence, source_lang, target_lang)
+
+    def generate():
+        started = time.perf_counter()
+        yield json.dumps({"segments": len(segments)}) + "\n"
+        # Keep at most BATCH_MAX_WORKERS segments in flight and emit in order.
+        in_flight = deque()
+        next_index = 0
+        cache_hits = 0
+        while next_index < len(segments) or in_flight:
+            while next_index < len(segments) and len(in_flight) < BATCH_MAX_WORKERS:
+                in_flight.append((next_index, batch_executor.submit(translate_segment, segments[next_index])))
+                next_index += 1
+            index, future = in_flight.popleft()
+            segment = segments[index]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Translation error: {e}")
+                result = {"error": "Translation service failed."}
+            cache_hits += result.get("cache") == "hit"
+            # The whitespace after the sentence lets clients rebuild the layout.
+            yield json.dumps({"index": index, "text": unwrap_lines(segment),
+                              "separator": segment[len(segment.rstrip()):], **result},
+                             ensure_ascii=False) + "\n"
+
+        keywords_in_english = find_medical_keywords(text_to_translate, source_lang)
+        metrics.stages.observe(time.perf_counter() - started, route="/translate/stream", stage="stream", pair=pair)
+        yield json.dumps({
+            "done": True,
+            **annotate_keywords(keywords_in_english, target_lang),
+            "cacheHits": cache_hits,
+            "totalMs": round((time.perf_counter() - started) * 1000, 2)
+        }, ensure_ascii=False) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@app.route('/backend/stats', methods=['GET'])
+def backend_stats():
+    return jsonify(translation_backend.stats())
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(translation_cache.stats())
+
+def extract_text(stream):
+    """Runs OCR on an uploaded image and returns (text, stage info)."""
+    # Use Tesseract for actual OCR
+    if OCR_PREPROCESS:
+        return ocr_image(stream, executor=ocr_tile_executor)
+    started = time.perf_counter()
+    image = Image.open(stream)
+    image.load()
+    decoded = time.perf_counter()
+    text = pytesseract.image_to_string(image)
+    return text, {"timings": {"decode": round((decoded - started) * 1000, 2),
+                              "ocr": round((time.perf_counter() - decoded) * 1000, 2)}}
+
+def ocr_error_kind(error):
+    """Upstream kind for Tesseract failures, or None for e.g. unreadable uploads."""
+    if isinstance(error, RuntimeError) and "timeout" in str(error).lower():
+        return "timeout"
+    if isinstance(error, (pytesseract.TesseractError, pytesseract.TesseractNotFoundError)):
+        return "error"
+    return None
+
 # Endpoint to process image using Tesseract
 @app.route('/process_image', methods=['POST'])
 def process_image():
@@ -202,20 +426,98 @@ def process_image():
         return jsonify({"error": "No file selected for uploading"}), 400
 
     try:
-        # Use Tesseract for actual OCR
-        image = Image.open(file.stream)
-        extracted_text = pytesseract.image_to_string(image)
+        extracted_text, ocr_info = extract_text(file.stream)
+        record_ocr_timings("/process_image", ocr_info)
         
         if not extracted_text.strip():
             return jsonify({"error": "Could not extract text from the image."}), 400
         
         # Return the extracted text to the frontend
-        return jsonify({"extractedText": extracted_text})
+        return jsonify({"extractedText": extracted_text, "ocr": ocr_info})
 
     except Exception as e:
         print(f"Error processing image: {e}")
+        if ocr_error_kind(e):
+            metrics.upstream_errors.inc(service="ocr", kind=ocr_error_kind(e))
         return jsonify({"error": f"Failed to process image: {str(e)}"}), 500
 
+# Multi-page PDFs: results stream back as JSON lines, one per finished page
+@app.route('/process_pdf', methods=['POST'])
+def process_pdf():
+    if 'file' not in request.files:
+        return jsonify({"error": "No file part in the request"}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "No file selected for uploading"}), 400
+
+    try:
+        pdf = open_pdf(file.read())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    source_lang = request.form.get('source', 'en')
+    target_lang = request.form.get('target')
+
+    pair = g.metrics_pair = pair_label(source_lang, target_lang) if target_lang else "-"
+
+    def translate_page(text):
+        return translated_result("/process_pdf", text, source_lang, target_lang)
+
+    def generate():
+        started = time.perf_counter()
+        try:
+            for result in iter_pdf_pages(pdf, pdf_page_executor,
+                                         postprocess=translate_page if target_lang else None,
+                                         max_pages=PDF_MAX_PAGES):
+                record_ocr_timings("/process_pdf", result.get("ocr"))
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        except Exception as e:
+            print(f"Error processing PDF: {e}")
+            if ocr_error_kind(e):
+                metrics.upstream_errors.inc(service="ocr", kind=ocr_error_kind(e))
+            yield json.dumps({"error": f"Failed to process PDF: {str(e)}"}) + "\n"
+            return
+        metrics.stages.observe(time.perf_counter() - started, route="/process_pdf", stage="stream", pair=pair)
+        yield json.dumps({"done": True, "totalMs": round((time.perf_counter() - started) * 1000, 2)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+# Asynchronous OCR: submit returns a job id, the client polls for the result
+@app.route('/process_image/jobs', methods=['POST'])
+def submit_ocr_job():
+    if 'file' not in request.files:
+        return jsonify({"error": "No file part in the request"}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "No file selected for uploading"}), 400
+
+    try:
+        job = ocr_jobs.submit(file.read())
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 429, {"Retry-After": "2"}
+
+    return jsonify(job.to_dict()), 202, {"Location": f"/process_image/jobs/{job.id}"}
+
+@app.route('/process_image/jobs/<job_id>', methods=['GET'])
+def get_ocr_job(job_id):
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        wait = -1
+    if not 0 <= wait < float("inf"):
+        return jsonify({"error": "'wait' must be a non-negative number of seconds"}), 400
+    wait = min(wait, OCR_MAX_WAIT)
+    job = ocr_jobs.get(job_id, wait=wait)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/process_image/jobs', methods=['GET'])
+def ocr_job_stats():
+    return jsonify(ocr_jobs.stats())
+
 if __name__ == '__main__':
     app.run(debug=True, port=5001)
 
@@ -0,0 +1,163 @@
+"""
+Async (ASGI) serving mode for /detect, /translate and /process_image.
+
+Shares the glossary, knowledge index, translation cache and language
+detector with app.py and returns the same responses, but waits on
+LibreTranslate without holding a thread, so concurrency is no longer
+capped by the worker's thread count. OCR still runs on threads via the
+default executor.
+
+    uvicorn asgi_app:app --port 5001
+"""
+import asyncio
+import io
+
+from quart import Quart, Response, jsonify, request
+from quart_cors import cors
+
+import app as sync_app
+from term_protection import translate_protected_async
+from async_libre_translate_api import AsyncLibreTranslateAPI
+
+app = cors(Quart(__name__))
+lt = None
+
+
+@app.before_serving
+async def open_client():
+    global lt
+    lt = AsyncLibreTranslateAPI(sync_app.LIBRETRANSLATE_URL)
+
+
+@app.after_serving
+async def close_client():
+    await lt.close()
+
+
+async def mt_translate(text, source_lang, target_lang):
+    try:
+        with sync_app.metrics.stage("/translate", "mt", sync_app.pair_label(source_lang, target_lang)):
+            if sync_app.translation_backend.name == "libretranslate":
+                translated = await lt.translate(text, source=source_lang, target=target_lang)
+            else:
+                # In-process backends block on the model, so run them on a thread.
+                translated = await asyncio.to_thread(sync_app.translation_backend.translate,
+                                                     text, source_lang, target_lang)
+    except Exception as e:
+        sync_app.metrics.upstream_errors.inc(service="mt", kind=sync_app.upstream_error_kind(e))
+        raise
+    return translated
+
+
+async def cached_translate(text, source_lang, target_lang):
+    # Same cache entries and glossary protection as app.translate_cached.
+    index, variant = None, ""
+    if sync_app.GLOSSARY_PROTECTION:
+        index = sync_app.knowledge.current()
+        variant = f"glossary-{index.digest}"
+    cached = sync_app.translation_cache.get(text, source_lang, target_lang, variant)
+    if cached is not None:
+        return cached, True
+
+    if index is not None:
+        translated = await translate_protected_async(mt_translate, text, source_lang, target_lang, index)
+    else:
+        translated = await mt_translate(text, source_lang, target_lang)
+    sync_app.translation_cache.set(text, source_lang, target_lang, translated, variant)
+    return translated, False
+
+
+async def remote_detect(text):
+    # Same stage timing and error counting as app.remote_detect.
+    try:
+        with sync_app.metrics.stage("/detect", "detect_remote"):
+            if sync_app.translation_backend.name == "libretranslate":
+                detected = await lt.detect(text)
+            else:
+                detected = await asyncio.to_thread(sync_app.translation_backend.detect, text)
+    except Exception as e:
+        sync_app.metrics.upstream_errors.inc(service="detect", kind=sync_app.upstream_error_kind(e))
+        raise
+    return sync_app.pick_detected_language(detected)
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics_route():
+    return Response(sync_app.metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route('/detect', methods=['POST'])
+async def detect_language_route():
+    data = await request.get_json()
+    if not data or 'text' not in data:
+        return jsonify({"error": "No text provided"}), 400
+
+    text_to_detect = data.get('text')
+    session = data.get('session')
+    detector = sync_app.language_detector
+    try:
+        local = detector.detect_local(text_to_detect, session=session)
+        if local is not None:
+            lang_code, via = local
+        else:
+            lang_code, confidence = await remote_detect(text_to_detect)
+            via = "remote"
+            detector.record_remote(text_to_detect, lang_code, session=session, confidence=confidence)
+        return jsonify({"language": lang_code, "via": via})
+    except Exception as e:
+        print(f"Detection error: {e}")
+        return jsonify({"error": "Language detection failed"}), 500
+
+
+@app.route('/translate', methods=['POST'])
+async def translate_text():
+    data = await request.get_json()
+    if data is None:
+        return jsonify({"error": "No JSON payload found"}), 400
+
+    text_to_translate = data.get('text')
+    source_lang = data.get('source', 'en')
+    target_lang = data.get('target', 'es')
+
+    if not text_to_translate:
+        return jsonify({"translatedText": "", "keywords": [], "recommendations": [], "visualAid": None, "cache": "miss"})
+
+    try:
+        keywords_in_english = sync_app.find_medical_keywords(text_to_translate, source_lang)
+        translated_text, cache_hit = await cached_translate(text_to_translate, source_lang, target_lang)
+        return jsonify({
+            "translatedText": translated_text,
+            **sync_app.annotate_keywords(keywords_in_english, target_lang),
+            "cache": "hit" if cache_hit else "miss"
+        })
+    except Exception as e:
+        print(f"Translation error: {e}")
+        return jsonify({"error": "Translation service failed."}), 500
+
+
+@app.route('/process_image', methods=['POST'])
+async def process_image():
+    files = await request.files
+    if 'file' not in files:
+        return jsonify({"error": "No file part in the request"}), 400
+
+    file = files['file']
+    if file.filename == '':
+        return jsonify({"error": "No file selected for uploading"}), 400
+
+    try:
+        image_bytes = file.read()
+        extracted_text, ocr_info = await asyncio.to_thread(sync_app.extract_text, io.BytesIO(image_bytes))
+
+        if not extracted_text.strip():
+            return jsonify({"error": "Could not extract text from the image."}), 400
+
+        return jsonify({"extractedText": extracted_text, "ocr": ocr_info})
+
+    except Exception as e:
+        print(f"Error processing image: {e}")
+        return jsonify({"error": f"Failed to process image: {str(e)}"}), 500
+
+
+if __name__ == '__main__':
+    app.run(debug=True, port=5001)
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import aiohttp
+
+from libre_translate_api import LibreTranslateError, LibreTranslateTimeout
+
+# Only connect timeouts are retried; a read timeout means the server is stuck
+# on the request. aiohttp before 3.10 can't tell them apart, so never retries.
+_CONNECT_TIMEOUT = getattr(aiohttp, "ConnectionTimeoutError", ())
+
+
+class AsyncLibreTranslateAPI:
+    """
+    asyncio counterpart of LibreTranslateAPI with the same methods, timeouts
+    and retry policy (read timeouts are not retried), on a pooled keep-alive aiohttp session. Create it from
+    inside the running event loop.
+    """
+
+    def __init__(self, url="http://localhost:5000/", api_key=None, pool_size=64,
+                 connect_timeout=3.0, read_timeout=30.0, retries=2, backoff=0.2):
+        self.url = url.rstrip("/") + "/"
+        self.api_key = api_key
+        self.retries = retries
+        self.backoff = backoff
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=pool_size),
+            timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+        )
+
+    async def _request(self, method, endpoint, params):
+        url = self.url + endpoint
+        attempt = 0
+        while True:
+            try:
+                if method == "GET":
+                    request = self._session.get(url, params=params)
+                else:
+                    request = self._session.post(url, data=params)
+                async with request as response:
+                    payload = await response.read()
+                if response.status < 400:
+                    return json.loads(payload.decode())
+                error = LibreTranslateError(f"HTTP {response.status} from {endpoint}: {payload[:200]!r}")
+                if response.status < 500:
+                    raise error
+            except asyncio.TimeoutError as e:
+                error = LibreTranslateTimeout(f"Timed out calling {endpoint}: {e}")
+                if not isinstance(e, _CONNECT_TIMEOUT):
+                    raise error
+            except aiohttp.ClientError as e:
+                error = LibreTranslateError(f"Failed calling {endpoint}: {e}")
+
+            if attempt >= self.retries:
+                raise error
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+            attempt += 1
+
+    async def translate(self, q, source="en", target="es"):
+        params = {"q": q, "source": source, "target": target}
+        if self.api_key:
+            params["api_key"] = self.api_key
+        return (await self._request("POST", "translate", params))["translatedText"]
+
+    async def detect(self, q):
+        params = {"q": q}
+        if self.api_key:
+            params["api_key"] = self.api_key
+        return await self._request("POST", "detect", params)
+
+    async def languages(self):
+        params = {"api_key": self.api_key} if self.api_key else {}
+        return await self._request("GET", "languages", params)
+
+    async def close(self):
+        await self._session.close()
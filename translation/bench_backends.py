@@ -0,0 +1,118 @@
+"""
+Latency and memory of the translation backends: LibreTranslate over HTTP
+(against the local stub server, so only the transport is measured unless
+--latency adds simulated model time) and in-process Argos, with and
+without batching of concurrent same-pair requests. Each backend runs in
+its own process so RSS is comparable. Argos needs the --pairs models
+installed locally (test_translator.py --install-models fetches them).
+
+    python bench_backends.py [--requests 200] [--threads 1 8 32] [--pairs en:es en:hi]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from memory_usage import format_mb, peak_rss_mb, rss_mb
+
+SENTENCES = [
+    "The patient has a fever and a cough.",
+    "Take this medicine twice a day after meals.",
+    "Do you have any pain in your chest?",
+    "The nurse will check your blood pressure.",
+]
+
+
+def make_backend(mode, pairs, latency):
+    if mode == "libretranslate":
+        from libre_translate_api import LibreTranslateAPI
+        from stub_libretranslate import start_stub_server
+        from translation_backends import LibreTranslateBackend
+
+        _, url = start_stub_server(latency=latency)
+        return LibreTranslateBackend(LibreTranslateAPI(url, pool_size=64))
+
+    from translation_backends import ArgosBackend
+    return ArgosBackend(preload=pairs, max_loaded_pairs=len(pairs),
+                        max_batch=1 if mode == "argos-unbatched" else 32,
+                        batch_window=0 if mode == "argos-unbatched" else 0.005)
+
+
+def run_mode(mode, pairs, requests, threads, latency):
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    backend = make_backend(mode, pairs, latency)
+    load_s = time.perf_counter() - start
+    rss_loaded = rss_mb()
+
+    results = []
+    for n in threads:
+        latencies = []
+
+        def call(i):
+            source, target = pairs[i % len(pairs)]
+            t0 = time.perf_counter()
+            backend.translate(f"{SENTENCES[i % len(SENTENCES)]} ({i})", source, target)
+            latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            list(pool.map(call, range(requests)))
+        elapsed = time.perf_counter() - t0
+        latencies.sort()
+        results.append({
+            "threads": n,
+            "rps": requests / elapsed,
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        })
+
+    backend.close()
+    return {
+        "mode": mode,
+        "load_s": load_s,
+        "rss_before_mb": rss_before,
+        "rss_loaded_mb": rss_loaded,
+        "peak_rss_mb": peak_rss_mb(),
+        "runs": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--pairs", nargs="+", default=["en:es"])
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated MT time per stub call (s)")
+    parser.add_argument("--modes", nargs="+", default=["libretranslate", "argos", "argos-unbatched"],
+                        choices=["libretranslate", "argos", "argos-unbatched"])
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    pairs = [tuple(pair.split(":", 1)) for pair in args.pairs]
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, pairs, args.requests, args.threads, args.latency)))
+        return
+
+    print(f"{'backend':>16} {'load s':>7} {'RSS MB':>7} {'peak MB':>8} {'threads':>8} "
+          f"{'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode in args.modes:
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--requests", str(args.requests),
+             "--latency", str(args.latency), "--pairs", *args.pairs,
+             "--threads", *map(str, args.threads)],
+            capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            print(f"{mode:>16} failed: {out.stderr.strip().splitlines()[-1] if out.stderr.strip() else out.returncode}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        for run in r["runs"]:
+            print(f"{mode:>16} {r['load_s']:>7.2f} {format_mb(r['rss_loaded_mb'], 7)} {format_mb(r['peak_rss_mb'], 8)} "
+                  f"{run['threads']:>8} {run['rps']:>8.0f} {run['p50_ms']:>8.2f} {run['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
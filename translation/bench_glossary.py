@@ -0,0 +1,86 @@
+"""
+Benchmarks the compiled glossary matcher against the original
+sort-and-scan find_medical_keywords.
+
+    python bench_glossary.py [--sizes 25 1000 10000 50000] [--lengths 100 1000 10000]
+"""
+import argparse
+import random
+import string
+import time
+
+from glossary_matcher import build_matchers
+
+
+def legacy_find_medical_keywords(glossary, text, source_lang):
+    # The pre-matcher implementation from app.py, kept here for comparison.
+    found_keywords = []
+    lower_text = " " + text.lower() + " "
+    sorted_glossary = sorted(glossary.items(), key=lambda item: len(item[0]), reverse=True)
+
+    for english_term, translations in sorted_glossary:
+        if source_lang in translations:
+            term_to_find = " " + translations[source_lang].lower() + " "
+            if term_to_find in lower_text:
+                found_keywords.append(english_term)
+                lower_text = lower_text.replace(term_to_find, " ")
+
+    return list(set(found_keywords))
+
+
+def synthetic_glossary(size, rng):
+    glossary = {}
+    while len(glossary) < size:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+                 for _ in range(rng.choice((1, 1, 1, 2, 3)))]
+        term = " ".join(words)
+        glossary[term] = {"en": term}
+    return glossary
+
+
+def synthetic_text(glossary, length, rng):
+    terms = list(glossary)
+    filler = ["the", "patient", "reports", "mild", "since", "yesterday", "and", "with"]
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(terms) if rng.random() < 0.1 else rng.choice(filler)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 1000, 10000, 50000])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'terms':>8} {'chars':>8} {'build ms':>10} {'legacy ms':>11} {'matcher ms':>11} {'speedup':>9}")
+    for size in args.sizes:
+        glossary = synthetic_glossary(size, rng)
+        start = time.perf_counter()
+        matcher = build_matchers(glossary)["en"]
+        build_ms = (time.perf_counter() - start) * 1000
+        for length in args.lengths:
+            text = synthetic_text(glossary, length, rng)
+            legacy = best_of(lambda: legacy_find_medical_keywords(glossary, text, "en"), args.repeat)
+            compiled = best_of(lambda: matcher.keys(text), args.repeat)
+            print(f"{size:>8} {length:>8} {build_ms:>10.1f} {legacy * 1000:>11.3f} "
+                  f"{compiled * 1000:>11.3f} {legacy / compiled:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Load benchmark for OCR: the synchronous /process_image route against the
+/process_image/jobs queue, using generated text images. Needs a working
+Tesseract install (set TESSERACT_CMD if it is not on the default path).
+
+    python bench_ocr.py [--uploads 32] [--clients 8] [--lines 30]
+"""
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytesseract
+
+import app as server
+from ocr_jobs import OCRJobQueue
+from synthetic_images import encode_image, make_text_image
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] if values else 0.0
+
+
+def upload(client, path, image_bytes):
+    return client.post(path, data={"file": (io.BytesIO(image_bytes), "scan.jpg")},
+                       content_type="multipart/form-data")
+
+
+def run_sync(images, clients):
+    latencies = []
+
+    def one(image_bytes):
+        client = server.app.test_client()
+        start = time.perf_counter()
+        response = upload(client, "/process_image", image_bytes)
+        latencies.append(time.perf_counter() - start)
+        return response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        statuses = list(pool.map(one, images))
+    return time.perf_counter() - start, latencies, statuses
+
+
+def run_jobs(images, clients):
+    latencies = []
+
+    def one(image_bytes):
+        client = server.app.test_client()
+        start = time.perf_counter()
+        response = upload(client, "/process_image/jobs", image_bytes)
+        if response.status_code != 202:
+            return response.status_code
+        job_id = response.get_json()["jobId"]
+        while True:
+            job = client.get(f"/process_image/jobs/{job_id}?wait=5").get_json()
+            if job["status"] in ("done", "failed"):
+                latencies.append(time.perf_counter() - start)
+                return 200
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        statuses = list(pool.map(one, images))
+    return time.perf_counter() - start, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=32)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--lines", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--max-pending", type=int, default=0)
+    args = parser.parse_args()
+
+    tesseract_cmd = os.environ.get("TESSERACT_CMD", "tesseract")
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    server.ocr_jobs = OCRJobQueue(max_workers=args.workers, max_pending=args.max_pending or None,
+                                  tesseract_cmd=tesseract_cmd, preprocess=server.OCR_PREPROCESS)
+
+    images = [encode_image(make_text_image(lines=args.lines, seed=i)) for i in range(args.uploads)]
+    print(f"{args.uploads} uploads, {args.clients} clients, {args.workers} OCR workers")
+    print(f"{'mode':>6} {'total s':>9} {'img/s':>7} {'p50 s':>7} {'p99 s':>7} {'429s':>5}")
+    for mode, runner in (("sync", run_sync), ("jobs", run_jobs)):
+        elapsed, latencies, statuses = runner(images, args.clients)
+        print(f"{mode:>6} {elapsed:>9.2f} {len(latencies) / elapsed:>7.2f} "
+              f"{percentile(latencies, 0.5):>7.2f} {percentile(latencies, 0.99):>7.2f} {statuses.count(429):>5}")
+    server.ocr_jobs.shutdown()
+
+
+if __name__ == "__main__":
+    main()
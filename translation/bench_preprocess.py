@@ -0,0 +1,92 @@
+"""
+End-to-end OCR latency and peak memory: raw upload straight to Tesseract
+against the ocr_pipeline preprocess-and-tile path, on generated phone-photo
+sized images. Each mode runs in its own process so peak RSS is comparable.
+Needs a working Tesseract install (TESSERACT_CMD overrides the binary).
+
+    python bench_preprocess.py [--megapixels 3 12 24] [--repeat 3]
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from memory_usage import format_mb, peak_rss_mb
+
+
+def write_page(megapixels, directory):
+    from synthetic_images import encode_image, make_text_image
+
+    height = int((megapixels * 1_000_000 * 1.414) ** 0.5)
+    width = int(height / 1.414)
+    path = os.path.join(directory, f"page_{megapixels}mp.jpg")
+    with open(path, "wb") as f:
+        f.write(encode_image(make_text_image(lines=60, width=width, height=height,
+                                             font_size=max(12, width // 50), skew=1.5, seed=7)))
+    return path
+
+
+def run_mode(mode, path, repeat):
+    # Runs in a fresh child process; the page is generated by the parent so
+    # it doesn't count towards this process's peak RSS.
+    import pytesseract
+    from PIL import Image
+
+    import ocr_pipeline
+
+    pytesseract.pytesseract.tesseract_cmd = os.environ.get("TESSERACT_CMD", "tesseract")
+    with open(path, "rb") as f:
+        page = f.read()
+    executor = ocr_pipeline.make_tile_executor(os.cpu_count() or 1)
+
+    latencies, stages = [], {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if mode == "raw":
+            pytesseract.image_to_string(Image.open(io.BytesIO(page)))
+        else:
+            _, info = ocr_pipeline.ocr_image(io.BytesIO(page), executor=executor)
+            stages = info["timings"]
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "mode": mode,
+        "best_s": min(latencies),
+        "mean_s": sum(latencies) / len(latencies),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages_ms": stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[3, 12, 24])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mode", choices=["raw", "pipeline"], help=argparse.SUPPRESS)
+    parser.add_argument("--page", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.page, args.repeat)))
+        return
+
+    print(f"{'MP':>5} {'mode':>9} {'best s':>8} {'mean s':>8} {'peak RSS MB':>12} {'stages ms'}")
+    with tempfile.TemporaryDirectory() as directory:
+        for megapixels in args.megapixels:
+            page = write_page(megapixels, directory)
+            for mode in ("raw", "pipeline"):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--mode", mode, "--page", page, "--repeat", str(args.repeat)],
+                    capture_output=True, text=True, check=True,
+                )
+                r = json.loads(out.stdout)
+                print(f"{megapixels:>5} {mode:>9} {r['best_s']:>8.2f} {r['mean_s']:>8.2f} "
+                      f"{format_mb(r['peak_rss_mb'], 12)} {r['stages_ms']}")
+
+
+if __name__ == "__main__":
+    main()
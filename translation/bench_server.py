@@ -0,0 +1,324 @@
+"""
+Benchmark suite for the translation server. Runs the Flask app in a
+subprocess against the stub LibreTranslate (stub_libretranslate) and stub
+Tesseract (stub_tesseract), so results depend on this code rather than on
+the MT model or OCR engine, and writes machine-readable results:
+
+    glossary    GlossaryMatcher over synthetic text in every glossary language
+    translate   /translate throughput per language pair and text length
+    detect      /detect with debounce-style traffic (growing prefixes per session)
+    ocr         /process_image on generated pages of several sizes
+
+    python bench_server.py --output results.json
+    python bench_server.py --save-baseline bench_baseline.json
+    python bench_server.py --baseline bench_baseline.json [--tolerance 0.15]
+
+With --baseline, every latency (*_ms) and throughput (rps, *_per_s)
+figure is compared with the saved run; the exit status is 1 when any is
+worse by more than the tolerance, or when errors appear. Baselines are
+machine-specific; record one on the machine that does the comparing.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bench_serving import free_port, start_server
+from knowledge_store import KnowledgeStore
+from stub_libretranslate import start_stub_server
+from stub_tesseract import write_stub_tesseract
+from synthetic_images import encode_image, make_text_image
+
+SCENARIOS = ["glossary", "translate", "detect", "ocr"]
+LENGTHS = {"short": 1, "medium": 8, "long": 40}  # sentences per request
+NO_SPACE_LANGUAGES = {"ja", "zh"}
+
+
+# --- Synthetic multilingual text ---
+
+class Corpus:
+    """Sentences per language: glossary terms mixed with filler words in the same script."""
+
+    def __init__(self, index, seed=0):
+        self.index = index
+        self.rng = random.Random(seed)
+        self.forms = {lang: list(index.forms(lang)) for lang in index.languages}
+        self.alphabet = {lang: sorted({c for form in forms for c in form if c.isalpha()})
+                         for lang, forms in self.forms.items()}
+
+    def word(self, lang):
+        return "".join(self.rng.choice(self.alphabet[lang]) for _ in range(self.rng.randint(2, 7)))
+
+    def sentence(self, lang, words=12, term_rate=0.2):
+        parts = [self.rng.choice(self.forms[lang]) if self.rng.random() < term_rate else self.word(lang)
+                 for _ in range(words)]
+        joiner = "" if lang in NO_SPACE_LANGUAGES else " "
+        return joiner.join(parts) + ("。" if lang in NO_SPACE_LANGUAGES else ".")
+
+    def text(self, lang, sentences):
+        return " ".join(self.sentence(lang) for _ in range(sentences))
+
+
+# --- Load generation ---
+
+def summarize(latencies, elapsed, errors):
+    latencies = sorted(latencies)
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+        "errors": errors,
+    }
+
+
+def run_load(jobs, concurrency):
+    """Runs `jobs` (callables taking a requests.Session) on `concurrency` threads."""
+    local = threading.local()
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def call(job):
+        nonlocal errors
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            ok = job(session)
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            errors += not ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, jobs))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+# --- Scenarios ---
+
+def bench_glossary(corpus, args):
+    results = {}
+    for lang in corpus.index.languages:
+        matcher = corpus.index.matcher(lang)
+        docs = [corpus.text(lang, 8) for _ in range(args.glossary_docs)]
+        chars = sum(len(doc) for doc in docs)
+        best = float("inf")
+        for _ in range(3):
+            started = time.perf_counter()
+            for doc in docs:
+                matcher.keys(doc)
+            best = min(best, time.perf_counter() - started)
+        results[f"glossary.{lang}"] = {
+            "docs": len(docs),
+            "chars_per_s": round(chars / best),
+            "per_doc_ms": round(best / len(docs) * 1000, 4),
+        }
+    return results
+
+
+def bench_translate(url, corpus, args):
+    results = {}
+    for pair in args.pairs:
+        source, target = pair.split("-")
+        for length, sentences in LENGTHS.items():
+            # A unique suffix per request keeps every call a cache miss.
+            texts = [f"{corpus.text(source, sentences)} {i}" for i in range(args.requests)]
+
+            def job(text):
+                def post(session):
+                    response = session.post(url + "/translate", json={"text": text, "source": source, "target": target})
+                    return response.status_code == 200
+                return post
+
+            results[f"translate.{pair}.{length}"] = run_load([job(text) for text in texts], args.concurrency)
+    return results
+
+
+def bench_detect(url, corpus, args):
+    # Each session "types" a sentence and the client sends the text every
+    # few keystrokes, like a debounced input box. Sessions run concurrently.
+    languages = ["en", "es", "de", "hi", "ru", "ja"]
+    sessions = []
+    for s in range(args.detect_sessions):
+        lang = languages[s % len(languages)]
+        sentence = corpus.sentence(lang, words=10)
+        prefixes = [sentence[:end] for end in range(4, len(sentence) + 1, args.debounce_chars)]
+        sessions.append((f"bench-{s}", prefixes))
+
+    before = requests.get(url + "/detect/stats").json()
+    local_latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def type_session(item):
+        nonlocal errors
+        session_id, prefixes = item
+        with requests.Session() as session:
+            for prefix in prefixes:
+                started = time.perf_counter()
+                response = session.post(url + "/detect", json={"text": prefix, "session": session_id})
+                with lock:
+                    local_latencies.append(time.perf_counter() - started)
+                    errors += response.status_code != 200
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(type_session, sessions))
+    result = summarize(local_latencies, time.perf_counter() - started, errors)
+    after = requests.get(url + "/detect/stats").json()
+    total = after["total"] - before["total"]
+    result["remote_rate"] = round((after["remote"] - before["remote"]) / total, 4) if total else 0.0
+    return {"detect.debounce": result}
+
+
+def bench_ocr(url, args):
+    results = {}
+    for megapixels in args.megapixels:
+        height = int((megapixels * 1_000_000 * 1.414) ** 0.5)
+        width = int(height / 1.414)
+        page = encode_image(make_text_image(lines=40, width=width, height=height,
+                                            font_size=max(12, width // 50), skew=1.0, seed=3))
+
+        def post(session):
+            response = session.post(url + "/process_image", files={"file": ("page.jpg", io.BytesIO(page), "image/jpeg")})
+            return response.status_code == 200
+
+        results[f"ocr.{megapixels:g}mp"] = run_load([post] * args.ocr_requests, args.ocr_concurrency)
+    return results
+
+
+# --- Baseline comparison ---
+
+def direction(metric):
+    if metric.endswith("_ms"):
+        return -1
+    if metric == "rps" or metric.endswith("_per_s"):
+        return 1
+    return 0
+
+
+def compare(results, baseline, tolerance):
+    """Prints a comparison table and returns the list of regressions."""
+    regressions = []
+    print(f"\n{'benchmark':<28} {'metric':<12} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, metrics in sorted(results.items()):
+        old_metrics = baseline.get(name)
+        if old_metrics is None:
+            print(f"{name:<28} (new)")
+            continue
+        if metrics.get("errors", 0) > old_metrics.get("errors", 0):
+            regressions.append(f"{name}: errors {old_metrics.get('errors', 0)} -> {metrics['errors']}")
+        for metric, value in metrics.items():
+            sign = direction(metric)
+            old = old_metrics.get(metric)
+            if not sign or not old:
+                continue
+            change = (value - old) / old
+            worse = -change * sign > tolerance
+            if worse:
+                regressions.append(f"{name} {metric}: {old} -> {value} ({change:+.1%})")
+            print(f"{name:<28} {metric:<12} {old:>12} {value:>12} {change:>+8.1%}{'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+def run_metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "save_baseline")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--pairs", nargs="+", default=["en-es", "en-hi", "hi-en", "es-de"])
+    parser.add_argument("--requests", type=int, default=100, help="requests per pair and length")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mt-latency", type=float, default=0.005, help="stub MT seconds per call")
+    parser.add_argument("--glossary-docs", type=int, default=200)
+    parser.add_argument("--detect-sessions", type=int, default=24)
+    parser.add_argument("--debounce-chars", type=int, default=3, help="keystrokes between /detect calls")
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[1, 4])
+    parser.add_argument("--ocr-requests", type=int, default=6)
+    parser.add_argument("--ocr-concurrency", type=int, default=2)
+    parser.add_argument("--ocr-latency", type=float, default=0.05, help="stub OCR seconds per megapixel")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare with this results JSON")
+    parser.add_argument("--save-baseline", help="write results JSON here as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    corpus = Corpus(KnowledgeStore().current(), seed=args.seed)
+    results = {}
+    if "glossary" in args.scenarios:
+        results.update(bench_glossary(corpus, args))
+
+    if set(args.scenarios) - {"glossary"}:
+        stub, mt_url = start_stub_server(latency=args.mt_latency)
+        with tempfile.TemporaryDirectory() as directory:
+            env = {"TESSERACT_CMD": write_stub_tesseract(directory, args.ocr_latency), "PROFILE_SAMPLE_RATE": "0"}
+            port = free_port()
+            process = start_server("sync", port, mt_url, env=env)
+            url = f"http://127.0.0.1:{port}"
+            try:
+                if "translate" in args.scenarios:
+                    results.update(bench_translate(url, corpus, args))
+                if "detect" in args.scenarios:
+                    results.update(bench_detect(url, corpus, args))
+                if "ocr" in args.scenarios:
+                    results.update(bench_ocr(url, args))
+            finally:
+                process.terminate()
+                process.wait()
+                stub.shutdown()
+
+    for name, metrics in results.items():
+        print(f"{name:<28} " + "  ".join(f"{k}={v}" for k, v in metrics.items()))
+
+    report = {"meta": run_metadata(args), "results": results}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"Wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
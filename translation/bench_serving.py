@@ -0,0 +1,109 @@
+"""
+Load test for the sync (Flask, threaded) and async (ASGI via uvicorn)
+serving modes against a local stub MT server. Reports requests/sec and
+p50/p99 latency for /translate at several client concurrency levels.
+
+    python bench_serving.py [--requests 2000] [--concurrency 16 64 256] [--latency 0.05]
+
+Uses distinct texts per request so the translation cache doesn't hide
+the MT round trip (pass --repeat-texts to measure the cached path).
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from stub_libretranslate import start_stub_server
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, port, mt_url, env=None):
+    env = {**os.environ, "LIBRETRANSLATE_URL": mt_url, "TRANSLATION_CACHE_DB": "", **(env or {})}
+    if mode == "sync":
+        cmd = [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port), "--with-threads"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "asgi_app:app", "--port", str(port), "--log-level", "warning"]
+    process = subprocess.Popen(cmd, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+
+async def drive(url, requests, concurrency, repeat_texts):
+    latencies, errors = [], 0
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as client:
+        queue = asyncio.Queue()
+        for i in range(requests):
+            queue.put_nowait(i)
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                i = queue.get_nowait()
+                text = "patient has fever and cough" if repeat_texts else f"patient {i} has fever and cough"
+                start = time.perf_counter()
+                async with client.post(url + "/translate", json={"text": text, "source": "en", "target": "es"}) as response:
+                    await response.read()
+                latencies.append(time.perf_counter() - start)
+                errors += response.status != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated MT time per call (s)")
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"])
+    parser.add_argument("--repeat-texts", action="store_true")
+    args = parser.parse_args()
+
+    stub, mt_url = start_stub_server(latency=args.latency)
+    print(f"{'mode':>6} {'clients':>8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    try:
+        for mode in args.modes:
+            port = free_port()
+            process = start_server(mode, port, mt_url)
+            try:
+                for concurrency in args.concurrency:
+                    r = asyncio.run(drive(f"http://127.0.0.1:{port}", args.requests, concurrency, args.repeat_texts))
+                    print(f"{mode:>6} {concurrency:>8} {r['rps']:>9.0f} {r['p50_ms']:>9.1f} "
+                          f"{r['p99_ms']:>9.1f} {r['errors']:>7}")
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
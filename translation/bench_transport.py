@@ -0,0 +1,52 @@
+"""
+Compares pooled keep-alive and one-connection-per-call LibreTranslateAPI
+throughput against the local stub server.
+
+    python bench_transport.py [--requests 2000] [--threads 1 8 32] [--latency 0.0]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from libre_translate_api import LibreTranslateAPI
+from stub_libretranslate import start_stub_server
+
+
+def run(lt, requests, threads):
+    latencies = []
+
+    def call(i):
+        start = time.perf_counter()
+        lt.translate(f"patient {i} has a fever", source="en", target="es")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return requests / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated MT time per call")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(latency=args.latency)
+    print(f"{'mode':>10} {'threads':>8} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    try:
+        for threads in args.threads:
+            for mode, pool_size in (("unpooled", 0), ("pooled", threads)):
+                lt = LibreTranslateAPI(url, pool_size=pool_size)
+                rps, p50, p99 = run(lt, args.requests, threads)
+                lt.close()
+                print(f"{mode:>10} {threads:>8} {rps:>10.0f} {p50 * 1000:>9.2f} {p99 * 1000:>9.2f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
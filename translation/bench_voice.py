@@ -0,0 +1,116 @@
+"""
+End-to-end latency of the voice loop: the old record-then-translate flow
+(whole utterance -> one recognition -> languages one after another)
+against voice_pipeline (VAD segments, per-segment recognition, languages
+in parallel). Uses a generated WAV of tone bursts separated by pauses,
+played back in real time, with simulated stage costs so the numbers
+reflect the pipeline shape rather than one machine's Whisper speed.
+
+    python bench_voice.py [--utterances 4] [--asr-rtf 0.3] [--mt 0.15] [--tts 0.3]
+
+Pass --wav to use a real recording (stage costs stay simulated).
+"""
+import argparse
+import array
+import math
+import os
+import tempfile
+import time
+import wave
+
+from voice_pipeline import VoicePipeline, read_wav, wav_chunks
+
+LANGUAGES = ["hi", "es", "de"]
+
+
+def write_test_wav(path, utterances, speech_s=1.5, pause_s=0.7, rate=16000):
+    samples = array.array("h")
+    for _ in range(utterances):
+        for i in range(int(speech_s * rate)):
+            envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 4 * i / rate)
+            samples.append(int(8000 * envelope * math.sin(2 * math.pi * 220 * i / rate)))
+        samples.extend([0] * int(pause_s * rate))
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.tobytes())
+
+
+def simulated_stages(asr_rtf, mt_s, tts_s):
+    def recognize(pcm, rate):
+        time.sleep(len(pcm) / 2 / rate * asr_rtf)
+        return f"segment of {len(pcm) // 2} samples"
+
+    def translate(text, source, target):
+        time.sleep(mt_s)
+        return f"[{target}] {text}"
+
+    def synthesize(text, lang):
+        time.sleep(tts_s)
+        return b"mp3"
+
+    return recognize, translate, synthesize
+
+
+def run_sequential(path, recognize, translate, synthesize):
+    # Old test_translator loop: record everything, then each stage in turn.
+    pcm, rate = read_wav(path)
+    chunks, _ = wav_chunks(path, realtime=True)
+    for _ in chunks:
+        pass
+    end_of_audio = time.perf_counter()
+    text = recognize(pcm, rate)
+    first_audio = None
+    for lang in LANGUAGES:
+        synthesize(translate(text, "en", lang), lang)
+        first_audio = first_audio or time.perf_counter()
+    return first_audio - end_of_audio, time.perf_counter() - end_of_audio
+
+
+def run_pipelined(path, recognize, translate, synthesize):
+    pipeline = VoicePipeline(recognize, translate, LANGUAGES, synthesize=synthesize)
+    chunks, rate = wav_chunks(path, realtime=True)
+    latencies = []
+    end_of_audio = None
+
+    def timed_chunks():
+        nonlocal end_of_audio
+        yield from chunks
+        end_of_audio = time.perf_counter()
+
+    for event in pipeline.run(timed_chunks(), rate):
+        if event["event"] == "translation":
+            latencies.append(event["latencyMs"])
+        elif event["event"] == "done":
+            done = event
+    pipeline.close()
+    return min(latencies) / 1000, time.perf_counter() - end_of_audio, done
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utterances", type=int, default=4)
+    parser.add_argument("--asr-rtf", type=float, default=0.3, help="recognition time per second of audio")
+    parser.add_argument("--mt", type=float, default=0.15, help="seconds per translation")
+    parser.add_argument("--tts", type=float, default=0.3, help="seconds per synthesis")
+    parser.add_argument("--wav", help="use this recording instead of generated audio")
+    args = parser.parse_args()
+
+    stages = simulated_stages(args.asr_rtf, args.mt, args.tts)
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.wav
+        if path is None:
+            path = os.path.join(directory, "utterances.wav")
+            write_test_wav(path, args.utterances)
+
+        first_s, tail_s = run_sequential(path, *stages)
+        print(f"{'mode':>10} {'first audio after segment ms':>29} {'done after speech ms':>21}")
+        print(f"{'sequential':>10} {first_s * 1000:>29.0f} {tail_s * 1000:>21.0f}")
+        first_s, tail_s, done = run_pipelined(path, *stages)
+        print(f"{'pipelined':>10} {first_s * 1000:>29.0f} {tail_s * 1000:>21.0f}")
+        print(f"segments: {done['segments']}, stages: {done['stages']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -84,6 +84,13 @@ function useDebounce(value, delay) {
   return debouncedValue;
 }
 
+// --- Detection session id ---
+// Lets /detect reuse its answer while the same textarea's text grows.
+function newSessionId() {
+  if (window.crypto?.randomUUID) return window.crypto.randomUUID();
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
 // --- Main App Component ---
 function App() {
   const [history, setHistory] = useState([]);
@@ -117,6 +124,7 @@ function App() {
   const textareaRef = useRef(null);
   const fileInputRef = useRef(null);
   const recognitionRef = useRef(null);
+  const detectSessionRef = useRef(newSessionId());
 
   useEffect(() => {
     const loadVoices = () => setVoices(window.speechSynthesis.getVoices());
@@ -142,7 +150,10 @@ function App() {
           const res = await fetch("http://localhost:5001/detect", {
             method: "POST",
             headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ text: debouncedInputText }),
+            body: JSON.stringify({
+              text: debouncedInputText,
+              session: detectSessionRef.current,
+            }),
           });
           const data = await res.json();
           if (
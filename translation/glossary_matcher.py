@@ -0,0 +1,155 @@
+import unicodedata
+
+# Scripts written without spaces between words. A glossary hit inside a run
+# of these characters is accepted without a word-boundary check.
+_NO_SPACE_RANGES = (
+    (0x0E00, 0x0EFF),   # Thai, Lao
+    (0x1000, 0x109F),   # Myanmar
+    (0x1780, 0x17FF),   # Khmer
+    (0x3040, 0x30FF),   # Hiragana, Katakana
+    (0x3400, 0x4DBF),   # CJK Extension A
+    (0x4E00, 0x9FFF),   # CJK Unified Ideographs
+    (0xF900, 0xFAFF),   # CJK Compatibility Ideographs
+    (0xFF66, 0xFF9F),   # Halfwidth Katakana
+    (0x20000, 0x2FA1F), # CJK Extensions B-F, Compatibility Supplement
+)
+
+
+def _is_no_space(ch):
+    cp = ord(ch)
+    for lo, hi in _NO_SPACE_RANGES:
+        if lo <= cp <= hi:
+            return True
+    return False
+
+
+def _is_mark(ch):
+    return unicodedata.category(ch)[0] == "M"
+
+
+def _is_word(ch):
+    return ch.isalnum() or _is_mark(ch)
+
+
+def _fold(ch):
+    # Lowercase one character without changing the text length, so match
+    # offsets always point back into the original string.
+    lowered = ch.lower()
+    return lowered if len(lowered) == 1 else ch
+
+
+def fold_text(text):
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return "".join(_fold(ch) for ch in text)
+
+
+class GlossaryMatcher:
+    """
+    Aho-Corasick automaton over the glossary forms of a single language.
+
+    The automaton is built once; `find` then reports the leftmost-longest,
+    non-overlapping matches in a single pass over the text.
+    """
+
+    def __init__(self, terms):
+        # terms: {surface form: key}; the key is returned for every match.
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [None]       # (length, key) of the term ending at this node
+        self._dict_link = [0]    # nearest suffix node that ends a term
+        for form, key in terms.items():
+            form = fold_text(form.strip())
+            if form:
+                self._add(form, key)
+        self._build_links()
+
+    def __len__(self):
+        return sum(1 for out in self._out if out is not None)
+
+    def _add(self, form, key):
+        node = 0
+        for ch in form:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+                self._dict_link.append(0)
+            node = nxt
+        self._out[node] = (len(form), key)
+
+    def _build_links(self):
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                link = self._fail[child]
+                self._dict_link[child] = link if self._out[link] is not None else self._dict_link[link]
+                queue.append(child)
+
+    def _at_boundary(self, text, start, end):
+        if start > 0:
+            before, first = text[start - 1], text[start]
+            if _is_mark(first) or (_is_word(before) and not (_is_no_space(before) or _is_no_space(first))):
+                return False
+        if end < len(text):
+            last, after = text[end - 1], text[end]
+            # Never split a grapheme cluster (Devanagari/Bengali vowel signs, viramas).
+            if _is_mark(after):
+                return False
+            if _is_word(after) and not (_is_no_space(last) or _is_no_space(after)):
+                return False
+        return True
+
+    def find(self, text):
+        """Returns (start, end, key) tuples for the longest non-overlapping matches."""
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        best = {}
+        node = 0
+        for i, ch in enumerate(fold_text(text)):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = node if out[node] is not None else dict_link[node]
+            while hit:
+                length, key = out[hit]
+                start, end = i + 1 - length, i + 1
+                if self._at_boundary(text, start, end) and length > best.get(start, (0,))[0]:
+                    best[start] = (length, key)
+                hit = dict_link[hit]
+
+        matches = []
+        cursor = 0
+        for start in sorted(best):
+            if start < cursor:
+                continue
+            length, key = best[start]
+            matches.append((start, start + length, key))
+            cursor = start + length
+        return matches
+
+    def keys(self, text):
+        """Returns matched keys in order of first appearance, without duplicates."""
+        return list(dict.fromkeys(key for _, _, key in self.find(text)))
+
+
+def build_matchers(glossary):
+    """
+    Compiles one matcher per language from a {key: {lang: form}} glossary.
+    """
+    forms_by_lang = {}
+    for key, translations in glossary.items():
+        for lang, form in translations.items():
+            forms_by_lang.setdefault(lang, {}).setdefault(form, key)
+    return {lang: GlossaryMatcher(forms) for lang, forms in forms_by_lang.items()}
@@ -0,0 +1,296 @@
+"""
+Compiled, memory-mapped medical knowledge index.
+
+medical_knowledge.json is the single source for glossary forms, symptom
+departments, department names and visual aids. `compile_knowledge` turns
+it into medical_knowledge.idx, a flat binary file that every worker maps
+read-only, so the OS shares one copy between Gunicorn processes:
+
+    header   <8s magic> <u32 n_terms> <u32 n_langs> <u32 meta_len>
+    meta     UTF-8 JSON: version, language codes, term keys (term id = position)
+    table    n_terms * n_langs * <u32 offset> <u32 length> into the blob
+    blob     UTF-8 JSON record per (term, language), precomputed:
+             {"form": ..., "departments": [translated names], "visual": url}
+
+Rebuild with `python knowledge_store.py`; the app also rebuilds a missing or
+stale index on startup and picks up a replaced index without a restart.
+The build rejects glossary forms that mix scripts (usually a copy-paste
+from the wrong language), forms shared by two terms in one language, and
+department names that mix scripts or aren't in their language's script.
+Forms written in a script their language doesn't use are kept for display
+but marked "protect": false, so MT translates those terms freely instead
+of pasting the form into the output (see term_protection). A term can opt
+out of protection in every language with "protect": false in the JSON,
+for words like "cold" or "delivery" whose everyday sense is as common as
+the medical one.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from functools import lru_cache
+
+from glossary_matcher import GlossaryMatcher
+from language_detect import SCRIPT_LANGUAGE, script_profile
+
+MAGIC = b"MEDKIDX1"
+_HEADER = struct.Struct("<8sIII")
+_ENTRY = struct.Struct("<II")
+
+# Script combinations a single form may legitimately use.
+MIXED_SCRIPTS_ALLOWED = ({"Kana", "Han"},)
+
+# Scripts of each language; languages not listed are written in Latin.
+LANGUAGE_SCRIPTS = {
+    **{lang: {script} for script, lang in SCRIPT_LANGUAGE.items()},
+    "ja": {"Kana", "Han"},
+    "zh": {"Han"},
+    **{lang: {"Cyrillic"} for lang in ("ru", "uk", "bg", "sr", "mk", "be", "kk")},
+    **{lang: {"Arabic"} for lang in ("fa", "ur")},
+    **{lang: {"Devanagari"} for lang in ("mr", "ne")},
+}
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PATH = os.path.join(BASE_DIR, "medical_knowledge.json")
+INDEX_PATH = os.path.join(BASE_DIR, "medical_knowledge.idx")
+
+
+def form_problems(terms):
+    """Returns "term/lang: problem" lines for mixed-script and duplicate forms."""
+    problems = []
+    seen = {}  # (lang, folded form) -> term key
+    for key, term in terms.items():
+        for lang, form in term.get("forms", {}).items():
+            scripts = set(script_profile(form)[0])
+            if len(scripts) > 1 and scripts not in MIXED_SCRIPTS_ALLOWED:
+                problems.append(f"{key}/{lang}: {form!r} mixes {', '.join(sorted(scripts))}")
+            other = seen.setdefault((lang, form.lower()), key)
+            if other != key:
+                problems.append(f"{key}/{lang}: {form!r} is also the form of {other!r}")
+    return problems
+
+
+def fits_language(form, lang):
+    """Whether every letter of `form` is in a script `lang` is written in."""
+    return set(script_profile(form)[0]) <= LANGUAGE_SCRIPTS.get(lang, {"Latin"})
+
+
+def department_problems(department_names):
+    """
+    Returns "department/lang: problem" lines for names that mix scripts or
+    use a script their language isn't written in. Names are only shown,
+    never protected, so both are errors.
+    """
+    problems = []
+    for department, names in department_names.items():
+        for lang, name in names.items():
+            scripts = set(script_profile(name)[0])
+            if len(scripts) > 1 and scripts not in MIXED_SCRIPTS_ALLOWED:
+                problems.append(f"{department}/{lang}: {name!r} mixes {', '.join(sorted(scripts))}")
+            elif not fits_language(name, lang):
+                problems.append(f"{department}/{lang}: {name!r} is not in a script {lang} is written in")
+    return problems
+
+
+def compile_knowledge(source_path=SOURCE_PATH, index_path=INDEX_PATH):
+    with open(source_path, encoding="utf-8") as f:
+        knowledge = json.load(f)
+
+    terms = knowledge["terms"]
+    department_names = knowledge.get("departments", {})
+    problems = form_problems(terms) + department_problems(department_names)
+    if problems:
+        raise ValueError(f"{source_path} has invalid glossary forms or department names:\n  "
+                         + "\n  ".join(problems))
+    languages = sorted({lang for term in terms.values() for lang in term.get("forms", {})}
+                       | {lang for names in department_names.values() for lang in names})
+    keys = list(terms)
+
+    blob = bytearray()
+    table = bytearray()
+    for key in keys:
+        term = terms[key]
+        for lang in languages:
+            record = {
+                "form": term.get("forms", {}).get(lang),
+                "departments": [department_names[d][lang] for d in term.get("departments", [])
+                                if lang in department_names.get(d, {})],
+                "visual": term.get("visual"),
+            }
+            if record["form"] is None and not record["departments"] and record["visual"] is None:
+                table += _ENTRY.pack(0, 0)
+                continue
+            if not term.get("protect", True):
+                record["protect"] = False
+            elif record["form"] is not None and not fits_language(record["form"], lang):
+                print(f"Glossary form {key}/{lang} {record['form']!r} uses a script {lang} isn't written in; "
+                      "it won't be protected during translation")
+                record["protect"] = False
+            data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            table += _ENTRY.pack(len(blob), len(data))
+            blob += data
+
+    meta = json.dumps({"version": knowledge.get("version"), "languages": languages, "terms": keys},
+                      ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    # Write to a temp file and rename, so running workers never see a half-written index.
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(keys), len(languages), len(meta)))
+        f.write(meta)
+        f.write(table)
+        f.write(blob)
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+class KnowledgeIndex:
+    """Read-only view over one compiled index file."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.mtime = os.fstat(f.fileno()).st_mtime
+        magic, n_terms, n_langs, meta_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a medical knowledge index")
+        meta = json.loads(self._mm[_HEADER.size:_HEADER.size + meta_len].decode("utf-8"))
+        self.version = meta["version"]
+        # Content digest: changes with any edit, even when "version" isn't bumped.
+        self.digest = hashlib.sha256(self._mm).hexdigest()[:16]
+        self.languages = meta["languages"]
+        self.terms = meta["terms"]
+        self._lang_ids = {lang: i for i, lang in enumerate(self.languages)}
+        self._term_ids = {key: i for i, key in enumerate(self.terms)}
+        self._n_langs = n_langs
+        self._table_offset = _HEADER.size + meta_len
+        self._blob_offset = self._table_offset + n_terms * n_langs * _ENTRY.size
+        self._matchers = {}
+        self._matcher_lock = threading.Lock()
+        self.record = lru_cache(maxsize=8192)(self._record)
+        self.annotate = lru_cache(maxsize=4096)(self._annotate)
+
+    def term_id(self, key):
+        return self._term_ids.get(key)
+
+    def _record(self, term_id, lang):
+        lang_id = self._lang_ids.get(lang)
+        if lang_id is None or term_id is None:
+            return None
+        offset, length = _ENTRY.unpack_from(self._mm, self._table_offset + (term_id * self._n_langs + lang_id) * _ENTRY.size)
+        if not length:
+            return None
+        start = self._blob_offset + offset
+        return json.loads(self._mm[start:start + length].decode("utf-8"))
+
+    def form(self, key, lang):
+        record = self.record(self.term_id(key), lang)
+        return record["form"] if record else None
+
+    def protectable(self, key, lang):
+        """Whether the `lang` form of `key` may replace that term in MT output."""
+        record = self.record(self.term_id(key), lang)
+        return bool(record and record["form"] and record.get("protect", True))
+
+    def forms(self, lang):
+        """{form: key} for every term that has a form in `lang`."""
+        forms = {}
+        for term_id, key in enumerate(self.terms):
+            record = self.record(term_id, lang)
+            if record and record["form"]:
+                forms.setdefault(record["form"], key)
+        return forms
+
+    def matcher(self, lang):
+        """Glossary matcher for `lang`, compiled on first use."""
+        matcher = self._matchers.get(lang)
+        if matcher is None and lang in self._lang_ids:
+            with self._matcher_lock:
+                matcher = self._matchers.get(lang)
+                if matcher is None:
+                    matcher = self._matchers[lang] = GlossaryMatcher(self.forms(lang))
+        return matcher
+
+    @property
+    def matchers(self):
+        return {lang: self.matcher(lang) for lang in self.languages}
+
+    def as_glossary(self, languages=None):
+        """{key: {lang: form}}, the shape the older dict glossaries used."""
+        glossary = {}
+        for term_id, key in enumerate(self.terms):
+            for lang in languages or self.languages:
+                record = self.record(term_id, lang)
+                if record and record["form"]:
+                    glossary.setdefault(key, {})[lang] = record["form"]
+        return glossary
+
+    def _annotate(self, keywords, target_lang):
+        # Memoised per (keyword tuple, target); keyword sets repeat constantly.
+        keywords_data, departments, visual_aid_url = [], [], None
+        for key in keywords:
+            record = self.record(self.term_id(key), target_lang)
+            if record is None:
+                continue
+            if record["form"]:
+                keywords_data.append({"term": record["form"], "english": key})
+            departments.extend(record["departments"])
+            if visual_aid_url is None:
+                visual_aid_url = record["visual"]
+        return {
+            "keywords": keywords_data,
+            "recommendations": list(dict.fromkeys(departments)),
+            "visualAid": visual_aid_url,
+        }
+
+
+class KnowledgeStore:
+    """
+    Hands out the current KnowledgeIndex and swaps in a new one when the
+    index file is replaced. Requests holding the old index keep using it
+    until they finish; its mapping is released once it is unreferenced.
+    """
+
+    def __init__(self, index_path=INDEX_PATH, source_path=SOURCE_PATH, check_interval=2.0):
+        self.index_path = index_path
+        self.source_path = source_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        if self._is_stale():
+            compile_knowledge(source_path, index_path)
+        self._index = KnowledgeIndex(index_path)
+
+    def _is_stale(self):
+        if not os.path.exists(self.index_path):
+            return True
+        return os.path.exists(self.source_path) and \
+            os.path.getmtime(self.source_path) > os.path.getmtime(self.index_path)
+
+    def current(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if now - self._checked_at >= self.check_interval:
+                    self._checked_at = now
+                    self._maybe_reload()
+        return self._index
+
+    def _maybe_reload(self):
+        try:
+            if self._is_stale():
+                compile_knowledge(self.source_path, self.index_path)
+            if os.path.getmtime(self.index_path) != self._index.mtime:
+                self._index = KnowledgeIndex(self.index_path)
+                print(f"Reloaded medical knowledge index (version {self._index.version})")
+        except (OSError, ValueError) as e:
+            print(f"Knowledge index reload failed, keeping version {self._index.version}: {e}")
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    path = compile_knowledge()
+    print(f"Wrote {path} ({os.path.getsize(path)} bytes) in {(time.perf_counter() - start) * 1000:.1f} ms")
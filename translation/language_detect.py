@@ -0,0 +1,262 @@
+"""
+Local fast path for /detect. Most edits can be answered without asking
+LibreTranslate:
+
+- text in a script used by a single language (Devanagari, Bengali,
+  Hangul, Kana, Arabic, ...) is classified from its Unicode blocks;
+- text in a shared script (Latin, Cyrillic, Han) is classified when its
+  glossary hits point at one language;
+- text that only grew since the session's last detection, without
+  introducing a new script, keeps the earlier answer, until it has
+  doubled in length since that answer was found;
+- text the remote detector has already seen reuses its answer.
+
+Everything else is escalated to the remote detector.
+"""
+import threading
+from collections import OrderedDict
+
+# (first, last, script); ranges cover letters only, punctuation and digits are ignored.
+_SCRIPT_RANGES = (
+    (0x0041, 0x024F, "Latin"),
+    (0x0370, 0x03FF, "Greek"),
+    (0x0400, 0x052F, "Cyrillic"),
+    (0x0590, 0x05FF, "Hebrew"),
+    (0x0600, 0x06FF, "Arabic"),
+    (0x0750, 0x077F, "Arabic"),
+    (0x0900, 0x097F, "Devanagari"),
+    (0x0980, 0x09FF, "Bengali"),
+    (0x0A00, 0x0A7F, "Gurmukhi"),
+    (0x0A80, 0x0AFF, "Gujarati"),
+    (0x0B80, 0x0BFF, "Tamil"),
+    (0x0C00, 0x0C7F, "Telugu"),
+    (0x0C80, 0x0CFF, "Kannada"),
+    (0x0D00, 0x0D7F, "Malayalam"),
+    (0x0E00, 0x0E7F, "Thai"),
+    (0x1100, 0x11FF, "Hangul"),
+    (0x3040, 0x30FF, "Kana"),
+    (0x3130, 0x318F, "Hangul"),
+    (0x3400, 0x4DBF, "Han"),
+    (0x4E00, 0x9FFF, "Han"),
+    (0xAC00, 0xD7AF, "Hangul"),
+    (0xFB50, 0xFDFF, "Arabic"),
+    (0xFE70, 0xFEFF, "Arabic"),
+)
+
+# Scripts that identify the language on their own.
+SCRIPT_LANGUAGE = {
+    "Greek": "el",
+    "Hebrew": "he",
+    "Arabic": "ar",
+    "Devanagari": "hi",
+    "Bengali": "bn",
+    "Gurmukhi": "pa",
+    "Gujarati": "gu",
+    "Tamil": "ta",
+    "Telugu": "te",
+    "Kannada": "kn",
+    "Malayalam": "ml",
+    "Thai": "th",
+    "Hangul": "ko",
+    "Kana": "ja",
+}
+
+MIN_LETTERS = 4          # too little text to trust any local answer
+MIN_SCRIPT_SHARE = 0.8   # share of letters the dominant script must cover
+MIN_GLOSSARY_HITS = 2
+MIN_PIN_CONFIDENCE = 70  # remote answers below this aren't reused for longer prefixes
+PREFIX_GROWTH = 2.0      # detect again once the text is this many times longer
+
+
+def _script_of(ch):
+    cp = ord(ch)
+    for lo, hi, script in _SCRIPT_RANGES:
+        if lo <= cp <= hi:
+            return script
+    return None
+
+
+def script_profile(text):
+    """Returns ({script: letter count}, total letters)."""
+    counts = {}
+    total = 0
+    for ch in text:
+        if not ch.isalpha():
+            continue
+        script = _script_of(ch)
+        if script is None:
+            continue
+        counts[script] = counts.get(script, 0) + 1
+        total += 1
+    return counts, total
+
+
+def dominant_script(text):
+    counts, total = script_profile(text)
+    if total < MIN_LETTERS:
+        return None
+    # Japanese mixes Kana with Han; any real amount of Kana settles it.
+    if counts.get("Kana", 0) and counts.get("Kana", 0) + counts.get("Han", 0) >= total * MIN_SCRIPT_SHARE:
+        return "Kana"
+    script, count = max(counts.items(), key=lambda item: item[1])
+    return script if count >= total * MIN_SCRIPT_SHARE else None
+
+
+class LanguageDetector:
+    """
+    Wraps a remote `detect(text) -> (language, confidence)` callable with
+    the local fast paths above; confidence is 0-100, and 0 for a fallback
+    answer. Sessions are explicit client-supplied ids. `matchers` maps language codes to GlossaryMatcher,
+    or is a callable returning such a mapping (for reloadable glossaries).
+    """
+
+    def __init__(self, remote_detect, matchers=None, max_sessions=4096, max_cached=4096):
+        self.remote_detect = remote_detect
+        self.matchers = matchers or {}
+        self.max_sessions = max_sessions
+        self.max_cached = max_cached
+        self._sessions = OrderedDict()
+        self._remote_results = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"script": 0, "glossary": 0, "prefix": 0, "cache": 0, "remote": 0}
+
+    def _from_glossary(self, text):
+        hits = {}
+        matchers = self.matchers() if callable(self.matchers) else self.matchers
+        for lang, matcher in matchers.items():
+            count = len(matcher.find(text))
+            if count:
+                hits[lang] = count
+        if not hits:
+            return None
+        ranked = sorted(hits.items(), key=lambda item: item[1], reverse=True)
+        best_lang, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0
+        if best >= MIN_GLOSSARY_HITS and best > runner_up:
+            return best_lang
+        return None
+
+    def _from_session(self, session, text, script):
+        # Only trusts an earlier answer when the text grew or shrank at the
+        # end without bringing in letters from another script, and hasn't
+        # outgrown the text the answer was found for.
+        if session is None:
+            return None
+        with self._lock:
+            previous = self._sessions.get(session)
+        if previous is None:
+            return None
+        prev_text, prev_lang, prev_script, basis = previous
+        if not prev_text or len(text) >= basis * PREFIX_GROWTH:
+            return None
+        if prev_text.startswith(text) and script == prev_script:
+            return prev_lang  # characters were deleted from the end
+        if not text.startswith(prev_text):
+            return None
+        added_counts, _ = script_profile(text[len(prev_text):])
+        if all(s == prev_script for s in added_counts):
+            return prev_lang
+        return None
+
+    def _from_cache(self, text):
+        """Returns (language, confidence) of an earlier remote answer, or None."""
+        with self._lock:
+            result = self._remote_results.get(text)
+            if result is not None:
+                self._remote_results.move_to_end(text)
+            return result
+
+    def _cache_remote(self, text, lang, confidence):
+        with self._lock:
+            self._remote_results[text] = (lang, confidence)
+            while len(self._remote_results) > self.max_cached:
+                self._remote_results.popitem(last=False)
+
+    def _remember(self, session, text, lang, script, basis=None):
+        # `basis` is the length of the text the answer was actually found
+        # for; prefix hits carry it forward unchanged.
+        if session is None:
+            return
+        with self._lock:
+            if basis is None:
+                previous = self._sessions.get(session)
+                basis = previous[3] if previous else len(text)
+            self._sessions[session] = (text, lang, script, basis)
+            self._sessions.move_to_end(session)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def _forget(self, session):
+        if session is None:
+            return
+        with self._lock:
+            self._sessions.pop(session, None)
+
+    def _count(self, via):
+        with self._lock:
+            self._counts[via] += 1
+
+    def detect_local(self, text, session=None):
+        """
+        Returns (language, via) when the fast paths are conclusive, else None;
+        the caller then asks the remote detector and reports back through
+        `record_remote`. Lets async callers await the remote call themselves.
+        """
+        script = dominant_script(text)
+        confidence = 100
+
+        lang = self._from_session(session, text, script)
+        if lang is not None:
+            via = "prefix"
+        elif script in SCRIPT_LANGUAGE:
+            lang, via = SCRIPT_LANGUAGE[script], "script"
+        else:
+            lang = self._from_glossary(text) if script else None
+            via = "glossary"
+            if lang is None:
+                cached = self._from_cache(text.strip())
+                if cached is None:
+                    return None
+                (lang, confidence), via = cached, "cache"
+
+        self._count(via)
+        if via == "prefix":
+            self._remember(session, text, lang, script)
+        elif confidence >= MIN_PIN_CONFIDENCE:
+            self._remember(session, text, lang, script, len(text))
+        else:
+            self._forget(session)
+        return lang, via
+
+    def record_remote(self, text, lang, session=None, confidence=100):
+        """Reports a remote answer; fallback or low-confidence ones aren't reused for prefixes."""
+        self._count("remote")
+        self._cache_remote(text.strip(), lang, confidence)
+        if confidence >= MIN_PIN_CONFIDENCE:
+            self._remember(session, text, lang, dominant_script(text), len(text))
+        else:
+            self._forget(session)
+
+    def detect(self, text, session=None):
+        """Returns (language, via): via is script, glossary, prefix, cache or remote."""
+        local = self.detect_local(text, session)
+        if local is not None:
+            return local
+        lang, confidence = self.remote_detect(text)
+        self.record_remote(text, lang, session, confidence)
+        return lang, "remote"
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            sessions = len(self._sessions)
+            cached = len(self._remote_results)
+        total = sum(counts.values())
+        return {
+            **counts,
+            "total": total,
+            "remoteAvoided": total - counts["remote"],
+            "remoteAvoidedRate": (total - counts["remote"]) / total if total else 0.0,
+            "sessions": sessions,
+            "cachedResults": cached,
+        }
@@ -1,35 +1,153 @@
 import json
-from urllib import request, parse
+import queue
+import socket
+import time
+from http import client
+from urllib import parse
+
+
+_STALE_CONNECTION_ERRORS = (client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class LibreTranslateError(Exception):
+    pass
+
+
+class LibreTranslateTimeout(LibreTranslateError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Keeps up to `size` persistent HTTP/1.1 connections to one host.
+    A size of 0 disables pooling and opens a fresh connection per request.
+    """
+
+    def __init__(self, scheme, host, port, size=8, connect_timeout=3.0, read_timeout=30.0):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.size = size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._idle = queue.LifoQueue(maxsize=size) if size else None
+
+    def _new_connection(self):
+        cls = client.HTTPSConnection if self.scheme == "https" else client.HTTPConnection
+        conn = cls(self.host, self.port, timeout=self.connect_timeout)
+        conn.connect()
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn.sock.settimeout(self.read_timeout)
+        return conn
+
+    def acquire(self):
+        """Returns (connection, reused)."""
+        if self._idle is not None:
+            try:
+                return self._idle.get_nowait(), True
+            except queue.Empty:
+                pass
+        return self._new_connection(), False
+
+    def release(self, conn, reusable=True):
+        if reusable and self._idle is not None:
+            try:
+                self._idle.put_nowait(conn)
+                return
+            except queue.Full:
+                pass
+        conn.close()
+
+    def close(self):
+        if self._idle is None:
+            return
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
 
 class LibreTranslateAPI:
-    def __init__(self, url="http://localhost:5000/", api_key=None):
+    def __init__(self, url="http://localhost:5000/", api_key=None, pool_size=8,
+                 connect_timeout=3.0, read_timeout=30.0, retries=2, backoff=0.2):
         self.url = url.rstrip("/") + "/"
         self.api_key = api_key
+        self.retries = retries
+        self.backoff = backoff
+        parsed = parse.urlsplit(self.url)
+        self._base_path = parsed.path
+        self.pool = ConnectionPool(
+            parsed.scheme or "http",
+            parsed.hostname,
+            parsed.port,
+            size=pool_size,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+        )
+
+    def _request(self, method, endpoint, params):
+        body = parse.urlencode(params).encode()
+        path = self._base_path + endpoint
+        headers = {"Connection": "keep-alive"}
+        if method == "GET":
+            if body:
+                path += "?" + body.decode()
+            body = None
+        else:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        attempt = 0
+        while True:
+            conn, reused = None, False
+            try:
+                conn, reused = self.pool.acquire()
+                # Connected: from here on a timeout means the server accepted
+                # the request and is stuck on it, and is not retried.
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+                self.pool.release(conn, reusable=not response.will_close)
+                conn = None
+                if response.status < 400:
+                    return json.loads(payload.decode())
+                error = LibreTranslateError(f"HTTP {response.status} from {endpoint}: {payload[:200]!r}")
+                if response.status < 500:
+                    raise error
+            except (socket.timeout, TimeoutError) as e:
+                error = LibreTranslateTimeout(f"Timed out calling {endpoint}: {e}")
+                if conn is not None:
+                    raise error
+            except (OSError, client.HTTPException) as e:
+                if reused and isinstance(e, _STALE_CONNECTION_ERRORS):
+                    # The server closed an idle keep-alive connection; retry on a
+                    # fresh one without spending a retry.
+                    continue
+                error = LibreTranslateError(f"Failed calling {endpoint}: {e}")
+            finally:
+                if conn is not None:
+                    self.pool.release(conn, reusable=False)
+
+            if attempt >= self.retries:
+                raise error
+            time.sleep(self.backoff * (2 ** attempt))
+            attempt += 1
 
     def translate(self, q, source="en", target="es"):
-        url = self.url + "translate"
         params = {"q": q, "source": source, "target": target}
         if self.api_key:
             params["api_key"] = self.api_key
-        data = parse.urlencode(params).encode()
-        req = request.Request(url, data=data)
-        response = request.urlopen(req)
-        return json.loads(response.read().decode())["translatedText"]
+        return self._request("POST", "translate", params)["translatedText"]
 
     def detect(self, q):
-        url = self.url + "detect"
         params = {"q": q}
         if self.api_key:
             params["api_key"] = self.api_key
-        data = parse.urlencode(params).encode()
-        req = request.Request(url, data=data)
-        response = request.urlopen(req)
-        return json.loads(response.read().decode())
+        return self._request("POST", "detect", params)
 
     def languages(self):
-        url = self.url + "languages"
         params = {"api_key": self.api_key} if self.api_key else {}
-        data = parse.urlencode(params).encode()
-        req = request.Request(url, data=data, method="GET")
-        response = request.urlopen(req)
-        return json.loads(response.read().decode())
+        return self._request("GET", "languages", params)
+
+    def close(self):
+        self.pool.close()
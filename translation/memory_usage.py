@@ -0,0 +1,55 @@
+"""
+Process memory figures for the benchmarks, on Linux, macOS and Windows.
+
+psutil is used when installed; otherwise the standard library's `resource`
+module (POSIX only) and /proc. A figure that can't be read is None, and
+`format_mb` prints it as "n/a", so a benchmark runs everywhere and just
+leaves out what the platform can't report.
+"""
+import sys
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _ru_maxrss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def rss_mb():
+    """Current resident set size of this process in MB, or None."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None."""
+    peak = _ru_maxrss_mb()
+    if peak is None and psutil is not None:
+        # Windows reports the peak working set.
+        peak_wset = getattr(psutil.Process().memory_info(), "peak_wset", None)
+        peak = peak_wset / (1024 * 1024) if peak_wset is not None else None
+    return peak
+
+
+def format_mb(value, width):
+    return f"{value:>{width}.0f}" if value is not None else f"{'n/a':>{width}}"
@@ -0,0 +1,191 @@
+"""
+Request metrics in the Prometheus text exposition format, without a
+client library: histograms for request and stage durations, counters for
+upstream failures, and gauges read from the components' stats() at
+scrape time.
+
+Stage timings are recorded explicitly (`with metrics.stage(route,
+"mt", pair):`) rather than from request globals, because batch and
+streaming routes do their work on executor threads.
+"""
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {series[-2]!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Metrics:
+    """
+    The server's metrics. `requests` and `stages` are labelled by route and
+    language pair ("-" when a route has none); `upstream_errors` by service
+    (mt, detect, ocr) and kind (error, timeout).
+    """
+
+    def __init__(self, prefix="medtrans"):
+        self.prefix = prefix
+        self.requests = Histogram(f"{prefix}_request_duration_seconds",
+                                  "Time to build the response, per route.",
+                                  ("route", "method", "status", "pair"))
+        self.stages = Histogram(f"{prefix}_stage_duration_seconds",
+                                "Time spent in each stage of a request.", ("route", "stage", "pair"))
+        self.upstream_errors = Counter(f"{prefix}_upstream_errors_total",
+                                       "Failed calls to MT, detection and OCR.", ("service", "kind"))
+        self._collectors = []
+
+    @contextmanager
+    def stage(self, route, stage, pair="-"):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.observe(time.perf_counter() - started, route=route, stage=stage, pair=pair)
+
+    def observe_stages(self, route, timings_ms, pair="-", prefix=""):
+        """Records a {stage: milliseconds} dict such as the OCR pipeline's timings."""
+        for stage, ms in timings_ms.items():
+            self.stages.observe(ms / 1000, route=route, stage=prefix + stage, pair=pair)
+
+    def add_gauges(self, name, help_text, read):
+        """`read()` returns {label value or None: number}, evaluated at scrape time."""
+        self._collectors.append((f"{self.prefix}_{name}", help_text, read))
+
+    def render(self):
+        lines = self.requests.render() + self.stages.render() + self.upstream_errors.render()
+        for name, help_text, read in self._collectors:
+            try:
+                values = read()
+            except Exception as e:
+                print(f"Metrics collector {name} failed: {e}")
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    labels = _labels(("key",), (key,)) if key is not None else ""
+                    lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class RequestProfiler:
+    """
+    Opt-in cProfile of a random sample of requests. With PROFILE_SAMPLE_RATE
+    above zero, that fraction of requests (and any request sent with an
+    X-Profile: 1 header) is profiled and written to PROFILE_DIR as
+    <route>-<timestamp>.prof, with the top functions printed.
+    """
+
+    def __init__(self, sample_rate=0.0, directory="profiles", top=15):
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.top = top
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0
+
+    def start(self, forced=False):
+        if not self.enabled or not (forced or random.random() < self.sample_rate):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread.
+            return None
+        return profiler
+
+    def finish(self, profiler, route):
+        profiler.disable()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{route}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident()}.prof")
+        profiler.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(self.top)
+        print(f"Profiled {route} -> {path}\n{summary.getvalue()}")
+        return path
+
+
+def profiler_from_env():
+    return RequestProfiler(
+        sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", "0")),
+        directory=os.environ.get("PROFILE_DIR", "profiles"),
+    )
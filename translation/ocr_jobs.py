@@ -0,0 +1,153 @@
+import io
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+
+class QueueFull(Exception):
+    pass
+
+
+def run_ocr(image_bytes, tesseract_cmd=None, preprocess=False):
+    """
+    Worker entry point. Runs in a pool process, so it takes raw bytes and
+    returns plain data.
+    """
+    import pytesseract
+    from PIL import Image
+
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    started_at = time.time()
+    if preprocess:
+        # Jobs already run one per core, so tiles run sequentially here.
+        from ocr_pipeline import ocr_image
+        text, info = ocr_image(io.BytesIO(image_bytes))
+        return {"text": text, "startedAt": started_at, "stages": info["timings"]}
+
+    image = Image.open(io.BytesIO(image_bytes))
+    image.load()
+    decoded_at = time.time()
+    text = pytesseract.image_to_string(image)
+    finished_at = time.time()
+    return {
+        "text": text,
+        "startedAt": started_at,
+        "stages": {"decode": (decoded_at - started_at) * 1000, "ocr": (finished_at - decoded_at) * 1000},
+    }
+
+
+class OCRJob:
+    def __init__(self, future):
+        self.id = uuid.uuid4().hex
+        self.future = future
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    def to_dict(self):
+        job = {"jobId": self.id, "status": "queued", "submittedAt": self.submitted_at}
+        if not self.future.done():
+            if self.future.running():
+                job["status"] = "running"
+            return job
+
+        try:
+            result = self.future.result()
+        except Exception as e:
+            job.update({"status": "failed", "error": f"Failed to process image: {e}"})
+            return job
+
+        job["timings"] = {
+            "queueMs": (result["startedAt"] - self.submitted_at) * 1000,
+            "stagesMs": result["stages"],
+            "totalMs": ((self.finished_at or time.time()) - self.submitted_at) * 1000,
+        }
+        if not result["text"].strip():
+            job.update({"status": "failed", "error": "Could not extract text from the image."})
+        else:
+            job.update({"status": "done", "extractedText": result["text"]})
+        return job
+
+
+class OCRJobQueue:
+    """
+    Runs OCR in a process pool sized to the machine. At most `max_pending`
+    jobs may be queued or running; `submit` raises QueueFull beyond that.
+    Finished jobs are kept for `result_ttl` seconds so clients can poll them.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, result_ttl=600, tesseract_cmd=None, preprocess=False):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 4
+        self.result_ttl = result_ttl
+        self.tesseract_cmd = tesseract_cmd
+        self.preprocess = preprocess
+        self._executor = None
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Started lazily so importing the app (and Flask's reloader) doesn't fork workers.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _on_done(self, job, executor):
+        job.finished_at = time.time()
+        broken = not job.future.cancelled() and isinstance(job.future.exception(), BrokenProcessPool)
+        with self._lock:
+            self._pending -= 1
+            # A worker died (e.g. killed for memory); the pool refuses all further
+            # work, so drop it and let the next submit start a fresh one.
+            if broken and self._executor is executor:
+                print("OCR worker process died; restarting the OCR pool")
+                self._executor = None
+                executor.shutdown(wait=False)
+
+    def _expire(self, now):
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and now - job.finished_at > self.result_ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, image_bytes):
+        with self._lock:
+            self._expire(time.time())
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"OCR queue is full ({self.max_pending} jobs pending)")
+            executor = self._get_executor()
+            try:
+                future = executor.submit(run_ocr, image_bytes, self.tesseract_cmd, self.preprocess)
+            except BrokenProcessPool:
+                self._executor = None
+                executor = self._get_executor()
+                future = executor.submit(run_ocr, image_bytes, self.tesseract_cmd, self.preprocess)
+            job = OCRJob(future)
+            self._jobs[job.id] = job
+            self._pending += 1
+        future.add_done_callback(lambda _: self._on_done(job, executor))
+        return job
+
+    def get(self, job_id, wait=0):
+        """Returns the job or None; `wait` long-polls up to that many seconds."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None and wait > 0:
+            try:
+                job.future.exception(timeout=wait)
+            except (FutureTimeout, CancelledError):
+                pass
+        return job
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.max_workers, "pending": self._pending,
+                    "maxPending": self.max_pending, "jobs": len(self._jobs)}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
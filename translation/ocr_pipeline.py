@@ -0,0 +1,212 @@
+"""
+Preprocessing and tiling in front of Tesseract.
+
+Large phone photos are decoded at reduced scale, converted to grayscale,
+binarized, deskewed and cut into horizontal text blocks. The blocks are
+OCR'd in parallel and joined back in reading order (top to bottom).
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytesseract
+from PIL import Image, ImageOps
+
+TARGET_DPI = 300
+ASSUMED_PAGE_WIDTH_IN = 8.27  # A4, used when the image carries no DPI
+MAX_SKEW_DEGREES = 5.0
+SKEW_STEP_DEGREES = 0.5
+MIN_BLOCK_GAP_PX = 24         # blank rows (at TARGET_DPI) that separate two blocks
+MAX_TILE_HEIGHT_PX = 600      # roughly six tiles per A4 page at TARGET_DPI
+MIN_TRUSTED_DPI = 150         # lower DPI tags are camera defaults (72/96), not scan resolution
+MAX_OUTPUT_PIXELS = 2481 * 3508  # A4 at TARGET_DPI; larger pages are scaled down regardless of DPI
+TILE_PADDING_PX = 8
+
+
+class StageTimer:
+    def __init__(self):
+        self.timings = {}
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.timings[stage] = round((now - self._last) * 1000, 2)
+        self._last = now
+
+
+def _source_dpi(image):
+    dpi = image.info.get("dpi")
+    if dpi and dpi[0] and dpi[0] >= MIN_TRUSTED_DPI:
+        return float(dpi[0])
+    return min(image.size) / ASSUMED_PAGE_WIDTH_IN
+
+
+def _scale(image, target_dpi):
+    scale = min(1.0, target_dpi / _source_dpi(image))
+    pixels = image.width * image.height * scale * scale
+    if pixels > MAX_OUTPUT_PIXELS:
+        scale *= (MAX_OUTPUT_PIXELS / pixels) ** 0.5
+    return scale
+
+
+def load_scaled(stream, target_dpi=TARGET_DPI):
+    """
+    Opens the image and decodes it straight to grayscale at roughly the
+    target DPI. For JPEGs `draft` lets libjpeg skip most of the full-size
+    decode; other formats are resized after decoding.
+    """
+    image = Image.open(stream)
+    scale = _scale(image, target_dpi)
+    target_size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+    if scale < 1.0:
+        image.draft("L", target_size)
+    image = image.convert("L")
+    if image.size != target_size and scale < 1.0:
+        image = image.resize(target_size, Image.Resampling.LANCZOS)
+    # Phone photos are often stored sideways with an EXIF orientation tag.
+    return ImageOps.exif_transpose(image)
+
+
+def otsu_threshold(gray):
+    histogram = gray.histogram()
+    total = sum(histogram)
+    sum_all = sum(i * count for i, count in enumerate(histogram))
+    sum_bg = weight_bg = 0
+    best_threshold, best_variance = 127, -1.0
+    for level, count in enumerate(histogram):
+        weight_bg += count
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += level * count
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = level, variance
+    return best_threshold
+
+
+def binarize(gray):
+    threshold = otsu_threshold(gray)
+    return gray.point(lambda value: 255 if value > threshold else 0, mode="L")
+
+
+def row_ink(binary):
+    """Fraction of dark pixels per row, computed by Pillow's box downscale."""
+    profile = ImageOps.invert(binary).resize((1, binary.height), Image.Resampling.BOX)
+    return [value / 255 for value in profile.getdata()]
+
+
+def estimate_skew(binary):
+    """
+    Picks the rotation whose row profile is sharpest: text lines line up
+    with pixel rows when the page is straight. Runs on a thumbnail.
+    """
+    thumb = binary.copy()
+    thumb.thumbnail((800, 800))
+    best_angle, best_score = 0.0, -1.0
+    steps = int(MAX_SKEW_DEGREES / SKEW_STEP_DEGREES)
+    for step in range(-steps, steps + 1):
+        angle = step * SKEW_STEP_DEGREES
+        rotated = thumb.rotate(angle, resample=Image.Resampling.NEAREST, fillcolor=255)
+        profile = row_ink(rotated)
+        mean = sum(profile) / len(profile)
+        score = sum((value - mean) ** 2 for value in profile)
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+
+def text_blocks(binary, min_gap=MIN_BLOCK_GAP_PX, max_height=MAX_TILE_HEIGHT_PX):
+    """
+    Splits the page into (top, bottom) bands of text rows separated by at
+    least `min_gap` blank rows. Neighbouring bands are merged while they fit
+    in `max_height`, so each Tesseract call gets a useful amount of text;
+    taller bands are cut at their emptiest row.
+    """
+    profile = row_ink(binary)
+    blocks = []
+    start = None
+    blank_run = 0
+    for y, ink in enumerate(profile):
+        if ink > 0.002:
+            if start is None:
+                start = y
+            blank_run = 0
+        elif start is not None:
+            blank_run += 1
+            if blank_run >= min_gap:
+                blocks.append((start, y - blank_run + 1))
+                start, blank_run = None, 0
+    if start is not None:
+        blocks.append((start, len(profile) - blank_run))
+
+    merged = []
+    for top, bottom in blocks:
+        if merged and bottom - merged[-1][0] <= max_height:
+            merged[-1] = (merged[-1][0], bottom)
+        else:
+            merged.append((top, bottom))
+
+    tiles = []
+    for top, bottom in merged:
+        while bottom - top > max_height:
+            window = profile[top + max_height // 2:top + max_height]
+            cut = top + max_height // 2 + window.index(min(window))
+            tiles.append((top, cut))
+            top = cut
+        tiles.append((top, bottom))
+    return tiles
+
+
+def preprocess(source, timer=None):
+    """Accepts a file-like object or an already decoded PIL image."""
+    timer = timer or StageTimer()
+    if isinstance(source, Image.Image):
+        gray = source.convert("L")
+    else:
+        gray = load_scaled(source)
+    timer.mark("decode")
+    binary = binarize(gray)
+    timer.mark("binarize")
+    angle = estimate_skew(binary)
+    if angle:
+        binary = binary.rotate(angle, resample=Image.Resampling.BILINEAR, expand=True, fillcolor=255)
+        binary = binary.point(lambda value: 255 if value > 127 else 0)
+    timer.mark("deskew")
+    return binary, angle
+
+
+def ocr_image(source, executor=None, tesseract_config="--psm 6"):
+    """
+    Returns (text, info) where info holds per-stage timings in
+    milliseconds, the deskew angle and the number of tiles. Tiles run on
+    `executor` when one is given, otherwise one after another.
+    """
+    timer = StageTimer()
+    binary, angle = preprocess(source, timer)
+    blocks = text_blocks(binary)
+    tiles = [
+        binary.crop((0, max(0, top - TILE_PADDING_PX), binary.width, min(binary.height, bottom + TILE_PADDING_PX)))
+        for top, bottom in blocks
+    ]
+    timer.mark("tile")
+
+    def recognise(tile):
+        return pytesseract.image_to_string(tile, config=tesseract_config).strip()
+
+    if executor is not None and len(tiles) > 1:
+        texts = list(executor.map(recognise, tiles))
+    else:
+        texts = [recognise(tile) for tile in tiles]
+    timer.mark("ocr")
+
+    text = "\n\n".join(t for t in texts if t)
+    return text, {"timings": timer.timings, "skewDegrees": angle, "tiles": len(tiles), "size": binary.size}
+
+
+def make_tile_executor(max_workers):
+    # Tesseract runs as a subprocess, so threads are enough to use every core.
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr-tile")
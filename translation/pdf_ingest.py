@@ -0,0 +1,118 @@
+"""
+Server-side PDF ingestion. Pages with an embedded text layer are used as
+is; only pages without one are rasterized and sent to OCR. Results are
+yielded page by page as they finish, so the first page arrives without
+waiting for the rest of the document.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import pypdfium2 as pdfium
+
+from ocr_pipeline import TARGET_DPI, ocr_image
+
+MIN_TEXT_CHARS = 20  # fewer extractable characters than this means a scanned page
+MAX_RENDER_PX = 4000  # cap for oversized pages, e.g. posters or images saved at 72 DPI
+
+# pdfium is not thread-safe, even across separate documents, and pypdfium2
+# doesn't lock for us. Every pdfium call (open, extract, render, close) from
+# any request thread goes through this lock.
+PDFIUM_LOCK = threading.Lock()
+
+
+def open_pdf(data):
+    try:
+        with PDFIUM_LOCK:
+            return pdfium.PdfDocument(data)
+    except pdfium.PdfiumError as e:
+        raise ValueError(f"Not a readable PDF: {e}")
+
+
+def close_pdf(pdf):
+    with PDFIUM_LOCK:
+        pdf.close()
+
+
+def extract_text_layer(page):
+    # Callers hold PDFIUM_LOCK.
+    textpage = page.get_textpage()
+    try:
+        return textpage.get_text_range().replace("\r\n", "\n").strip()
+    finally:
+        textpage.close()
+
+
+def render_page(page, dpi=TARGET_DPI):
+    # Callers hold PDFIUM_LOCK. The PIL image is copied out of the pdfium
+    # bitmap so the bitmap can be freed here rather than by a finalizer
+    # running later on some other thread.
+    width, height = page.get_size()  # in points
+    scale = min(dpi / 72, MAX_RENDER_PX / max(width, height, 1))
+    bitmap = page.render(scale=scale, grayscale=True)
+    try:
+        return bitmap.to_pil().copy()
+    finally:
+        bitmap.close()
+
+
+def process_page(page_no, text, image, postprocess=None):
+    """Runs on a worker thread: OCR when there is no text layer, then `postprocess`."""
+    started = time.perf_counter()
+    result = {"page": page_no, "source": "text"}
+    if image is not None:
+        text, ocr_info = ocr_image(image)
+        result.update({"source": "ocr", "ocr": ocr_info})
+    result["text"] = text
+    if postprocess is not None and text.strip():
+        result.update(postprocess(text))
+    result["pageMs"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def iter_pdf_pages(pdf, executor, postprocess=None, max_pages=None, window=4):
+    """
+    Yields one dict per page in completion order, starting with a header
+    carrying the page count. Text extraction and rendering run on the
+    calling thread under PDFIUM_LOCK; OCR and `postprocess` run on
+    `executor`. At most `window` pages are in flight, which bounds memory
+    to a few rendered pages regardless of document length. Closes `pdf`
+    when done.
+    """
+    try:
+        with PDFIUM_LOCK:
+            total = len(pdf)
+        pages = min(total, max_pages) if max_pages else total
+        yield {"pages": pages, "totalPages": total}
+
+        in_flight = {}
+
+        def finished(futures):
+            for future in futures:
+                page_no = in_flight.pop(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    yield {"page": page_no, "error": f"Failed to process page: {e}"}
+
+        for index in range(pages):
+            with PDFIUM_LOCK:
+                page = pdf[index]
+                try:
+                    text = extract_text_layer(page)
+                    image = None if len(text) >= MIN_TEXT_CHARS else render_page(page)
+                finally:
+                    page.close()
+            future = executor.submit(process_page, index + 1, text if image is None else None, image, postprocess)
+            in_flight[future] = index + 1
+
+            yield from finished([f for f in in_flight if f.done()])
+            if len(in_flight) >= window:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                yield from finished(done)
+
+        while in_flight:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            yield from finished(done)
+    finally:
+        close_pdf(pdf)
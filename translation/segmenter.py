@@ -0,0 +1,74 @@
+import re
+
+# Sentence ends: Latin/Cyrillic punctuation, Devanagari danda, CJK full stops,
+# and blank lines (paragraph breaks). A single newline is not an end: OCR and
+# pasted text wrap lines mid-sentence. CJK punctuation needs no following
+# space; the rest does, so "3.5 mg" and "Dr. " followed by a lowercase word
+# are less likely to be split.
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[^a-z\s])|(?<=[।॥。！？])\s*|\n[^\S\n]*\n\s*")
+_BLANK_LINE = re.compile(r"\n[^\S\n]*\n")
+_WORD_BEFORE_DOT = re.compile(r"([\w.]+)\.\Z")
+
+# Words whose trailing period does not end a sentence, lowercased.
+ABBREVIATIONS = frozenset({
+    "dr", "dra", "mr", "mrs", "ms", "prof", "sr", "sra", "st",
+    "vs", "approx", "e.g", "i.e", "z.b", "fig",
+})
+
+_LINE_WRAP = re.compile(r"[^\S\n]*\n\s*")
+# CJK punctuation, Kana, Han and full-width forms: wrapped lines join without a space.
+_NO_SPACE_SCRIPT = re.compile("[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+MAX_SEGMENT_CHARS = 1000
+
+
+def _split_long(segment, limit):
+    while len(segment) > limit:
+        cut = segment.rfind(" ", 0, limit)
+        if cut <= 0:
+            cut = limit - 1
+        yield segment[:cut + 1]
+        segment = segment[cut + 1:]
+    if segment:
+        yield segment
+
+
+def _after_abbreviation(text, match):
+    if text[match.start() - 1] != "." or _BLANK_LINE.search(match.group()):
+        return False
+    word = _WORD_BEFORE_DOT.search(text, max(0, match.start() - 12), match.start())
+    return word is not None and word.group(1).lower() in ABBREVIATIONS
+
+
+def split_sentences(text, max_chars=MAX_SEGMENT_CHARS):
+    """
+    Splits text into sentence segments. Each segment keeps its trailing
+    whitespace, so "".join(segments) == text. Segments longer than
+    `max_chars` are cut at a space to stay under MT request limits.
+    """
+    segments = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        end = match.end()
+        if end > start and not _after_abbreviation(text, match):
+            segments.extend(_split_long(text[start:end], max_chars))
+            start = end
+    if start < len(text):
+        segments.extend(_split_long(text[start:], max_chars))
+    return segments
+
+
+def unwrap_lines(segment):
+    """
+    The segment's text without surrounding whitespace, with wrapped lines
+    joined by a space (or directly, between Chinese/Japanese characters).
+    """
+    segment = segment.strip()
+
+    def join(match):
+        before, after = segment[match.start() - 1], segment[match.end()]
+        if _NO_SPACE_SCRIPT.match(before) and _NO_SPACE_SCRIPT.match(after):
+            return ""
+        return " "
+
+    return _LINE_WRAP.sub(join, segment)
@@ -0,0 +1,85 @@
+"""
+Minimal stand-in for a LibreTranslate server, for offline benchmarks.
+
+    python stub_libretranslate.py --port 5000 --latency 0.02
+
+/translate echoes the text tagged with the target language, /detect answers
+"en", and /languages lists a fixed set of codes. Responses are HTTP/1.1 with
+keep-alive, so pooled clients can reuse connections.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import parse
+
+LANGUAGES = ["en", "hi", "es", "de", "fr", "ar", "bn", "zh", "ja", "ko", "ru", "pt", "it", "nl", "tr", "pl", "sv"]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _params(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode() if length else ""
+        query = parse.urlsplit(self.path).query
+        return {k: v[0] for k, v in parse.parse_qs(body or query).items()}
+
+    def _send(self, payload, status=200):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self):
+        params = self._params()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        path = parse.urlsplit(self.path).path.rstrip("/")
+        if path == "/translate":
+            return self._send({"translatedText": f"[{params.get('target', 'es')}] {params.get('q', '')}"})
+        if path == "/detect":
+            return self._send([{"language": "en", "confidence": 90.0}])
+        if path == "/languages":
+            return self._send([{"code": code, "name": code, "targets": LANGUAGES} for code in LANGUAGES])
+        return self._send({"error": "Not found"}, status=404)
+
+    do_GET = _route
+    do_POST = _route
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default backlog of 5 drops connection bursts
+
+    def __init__(self, address, latency=0.0):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+
+
+def start_stub_server(port=0, latency=0.0):
+    """Starts the stub on a background thread and returns (server, url)."""
+    server = StubServer(("127.0.0.1", port), latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of simulated model time per call")
+    args = parser.parse_args()
+    server = StubServer(("127.0.0.1", args.port), args.latency)
+    print(f"Stub LibreTranslate listening on http://127.0.0.1:{args.port}/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Minimal stand-in for the tesseract CLI, for offline benchmarks.
+
+pytesseract runs `tesseract <image> <output base> [-l lang] [options] txt`;
+this writes a fixed clinical sentence to <output base>.txt after sleeping
+--latency seconds per megapixel of input (read from the image header), so
+OCR cost still scales with image size.
+
+    python stub_tesseract.py --latency 0.05 image.png out txt
+
+`write_stub_tesseract` creates an executable wrapper that pytesseract can
+use as tesseract_cmd: a shell script, or tesseract.cmd on Windows.
+"""
+import os
+import stat
+import sys
+import time
+
+TEXT = "Patient has fever and cough.\nTake the medicine twice a day.\n"
+DEFAULT_LATENCY = 0.05
+
+
+def main(argv):
+    if "--version" in argv:
+        print("tesseract 5.3.0 (stub)")
+        return 0
+    if "--list-langs" in argv:
+        print("List of available languages (1):\neng")
+        return 0
+
+    latency = DEFAULT_LATENCY
+    if "--latency" in argv:
+        i = argv.index("--latency")
+        latency = float(argv[i + 1])
+        del argv[i:i + 2]
+    if len(argv) < 2:
+        print("usage: stub_tesseract.py [--latency s] image outputbase [options] [txt]", file=sys.stderr)
+        return 1
+
+    image_path, output_base = argv[0], argv[1]
+    from PIL import Image
+
+    with Image.open(image_path) as image:
+        megapixels = image.width * image.height / 1_000_000
+    time.sleep(latency * megapixels)
+    with open(output_base + ".txt", "w", encoding="utf-8") as f:
+        f.write(TEXT)
+    return 0
+
+
+def write_stub_tesseract(directory, latency=DEFAULT_LATENCY):
+    """Writes an executable `tesseract` wrapper into `directory` and returns its path."""
+    script = os.path.abspath(__file__)
+    if os.name == "nt":
+        path = os.path.join(directory, "tesseract.cmd")
+        with open(path, "w") as f:
+            f.write(f'@"{sys.executable}" "{script}" --latency {latency} %*\n')
+        return path
+    path = os.path.join(directory, "tesseract")
+    with open(path, "w") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{script}" --latency {latency} "$@"\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
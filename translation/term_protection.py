@@ -0,0 +1,116 @@
+"""
+Glossary term protection around machine translation.
+
+Glossary terms found in the source are replaced by numbered placeholders
+before the text goes to the MT engine, and the placeholders in its output
+are replaced by the target-language glossary forms afterwards. Both steps
+are a single pass over the text: matches come from the glossary matcher's
+offsets and restoration is one regex substitution.
+
+If the engine drops or mangles a placeholder, the text is translated
+again without protection, so a term is never silently lost.
+"""
+import re
+
+PLACEHOLDER = "[[T{}]]"
+# Tolerates the spacing and case changes MT engines make to unknown tokens.
+_PLACEHOLDER = re.compile(r"\[\s*\[\s*[Tt]\s*(\d+)\s*\]\s*\]")
+
+
+def protect_terms(text, matcher, target_form):
+    """
+    Returns (protected text, forms), where forms[i] replaces placeholder i.
+    `target_form(key)` gives the target-language form of a glossary key, or
+    None to leave that term to the MT engine. Text that already contains
+    something placeholder-like is returned unprotected, since restoring
+    would overwrite the user's own "[[T0]]".
+    """
+    if _PLACEHOLDER.search(text):
+        return text, []
+    pieces, forms = [], []
+    last = 0
+    for start, end, key in matcher.find(text):
+        form = target_form(key)
+        if not form:
+            continue
+        # Keep a sentence-initial capital.
+        if text[start].isupper() and form[0].islower():
+            form = form[0].upper() + form[1:]
+        pieces.append(text[last:start])
+        pieces.append(PLACEHOLDER.format(len(forms)))
+        forms.append(form)
+        last = end
+    pieces.append(text[last:])
+    return "".join(pieces), forms
+
+
+def restore_terms(text, forms):
+    """Returns (text with placeholders replaced, whether every placeholder was found)."""
+    found = set()
+
+    def replace(match):
+        i = int(match.group(1))
+        if i >= len(forms):
+            return match.group(0)
+        found.add(i)
+        return forms[i]
+
+    restored = _PLACEHOLDER.sub(replace, text)
+    return restored, len(found) == len(forms)
+
+
+def protect_for(index, text, source, target):
+    """
+    protect_terms with the matcher and target forms of a KnowledgeIndex.
+    Terms whose source or target form the index marks unprotectable (see
+    knowledge_store) are left to the MT engine.
+    """
+    matcher = index.matcher(source)
+    if matcher is None or source == target:
+        return text, []
+
+    def target_form(key):
+        if index.protectable(key, source) and index.protectable(key, target):
+            return index.form(key, target)
+        return None
+
+    return protect_terms(text, matcher, target_form)
+
+
+def _protected_calls(text, source, target, index):
+    """
+    The protection steps shared by the sync and async wrappers: yields each
+    text to translate, is sent its translation, and returns the result.
+    """
+    protected, forms = protect_for(index, text, source, target)
+    if forms:
+        restored, complete = restore_terms((yield protected), forms)
+        if complete:
+            return restored
+        print(f"Glossary placeholders lost in {source}->{target} translation; retrying without protection")
+    return (yield text)
+
+
+def translate_protected(translate, text, source, target, index):
+    """
+    translate(text, source, target) with glossary terms from `index` kept
+    as their target-language forms.
+    """
+    calls = _protected_calls(text, source, target, index)
+    try:
+        q = next(calls)
+        while True:
+            q = calls.send(translate(q, source, target))
+    except StopIteration as done:
+        return done.value
+
+
+async def translate_protected_async(translate, text, source, target, index):
+    """translate_protected for an async `translate` coroutine function."""
+    calls = _protected_calls(text, source, target, index)
+    try:
+        q = next(calls)
+        while True:
+            q = calls.send(await translate(q, source, target))
+    except StopIteration as done:
+        return done.value
@@ -1,9 +1,10 @@
-import speech_recognition as sr
 import argostranslate.package
-import argostranslate.translate
-from gtts import gTTS
-import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from knowledge_store import KnowledgeStore
+from translation_backends import ArgosBackend
+from term_protection import translate_protected
+from voice_pipeline import VoicePipeline, microphone_chunks, play_mp3, wav_chunks, whisper_recognizer
 
 # Supported output languages
 LANGUAGES = {
@@ -14,101 +15,87 @@ LANGUAGES = {
 
 FROM_LANGUAGE_CODE = "en"
 
-# Expanded medical glossary
-medical_glossary = {
-    "fever": {"hi": "बुखार", "es": "fiebre", "de": "Fieber"},
-    "cough": {"hi": "खांसी", "es": "tos", "de": "Husten"},
-    "headache": {"hi": "सिरदर्द", "es": "dolor de cabeza", "de": "Kopfschmerzen"},
-    "vomiting": {"hi": "उल्टी", "es": "vómito", "de": "Erbrechen"},
-    "blood pressure": {"hi": "रक्तचाप", "es": "presión arterial", "de": "Blutdruck"},
-    "diabetes": {"hi": "मधुमेह", "es": "diabetes", "de": "Diabetes"},
-    "chest pain": {"hi": "सीने में दर्द", "es": "dolor en el pecho", "de": "Brustschmerzen"},
-    "cold": {"hi": "सर्दी", "es": "resfriado", "de": "Erkältung"},
-    "asthma": {"hi": "दमा", "es": "asma", "de": "Asthma"},
-    "infection": {"hi": "संक्रमण", "es": "infección", "de": "Infektion"},
-    "injury": {"hi": "चोट", "es": "lesión", "de": "Verletzung"},
-    "fracture": {"hi": "फ्रैक्चर", "es": "fractura", "de": "Fraktur"},
-    "burn": {"hi": "जलना", "es": "quemadura", "de": "Verbrennung"},
-    "allergy": {"hi": "एलर्जी", "es": "alergia", "de": "Allergie"},
-    "high temperature": {"hi": "तेज़ बुखार", "es": "alta temperatura", "de": "hohes Fieber"},
-    "low blood pressure": {"hi": "कम रक्तचाप", "es": "presión baja", "de": "niedriger Blutdruck"},
-    "heart attack": {"hi": "दिल का दौरा", "es": "ataque al corazón", "de": "Herzinfarkt"},
-    "stroke": {"hi": "स्ट्रोक", "es": "derrame cerebral", "de": "Schlaganfall"},
-    "cancer": {"hi": "कैंसर", "es": "cáncer", "de": "Krebs"},
-    "tumor": {"hi": "गांठ", "es": "tumor", "de": "Tumor"},
-    "pregnancy": {"hi": "गर्भावस्था", "es": "embarazo", "de": "Schwangerschaft"},
-    "labor pain": {"hi": "प्रसव पीड़ा", "es": "dolor de parto", "de": "Wehenschmerz"},
-    "delivery": {"hi": "प्रसव", "es": "parto", "de": "Entbindung"},
-    "urine infection": {"hi": "मूत्र संक्रमण", "es": "infección urinaria", "de": "Harnwegsinfektion"},
-    "painkiller": {"hi": "दर्द निवारक", "es": "analgésico", "de": "Schmerzmittel"},
-    "surgery": {"hi": "सर्जरी", "es": "cirugía", "de": "Operation"},
-    "operation": {"hi": "ऑपरेशन", "es": "operación", "de": "Operation"},
-    "oxygen": {"hi": "ऑक्सीजन", "es": "oxígeno", "de": "Sauerstoff"},
-    "anemia": {"hi": "खून की कमी", "es": "anemia", "de": "Anämie"},
-    "jaundice": {"hi": "पीलिया", "es": "ictericia", "de": "Gelbsucht"},
-    "diarrhea": {"hi": "दस्त", "es": "diarrea", "de": "Durchfall"},
-    "constipation": {"hi": "कब्ज", "es": "estreñimiento", "de": "Verstopfung"},
-    "medicine": {"hi": "दवा", "es": "medicina", "de": "Medikament"},
-    "doctor": {"hi": "डॉक्टर", "es": "médico", "de": "Arzt"},
-    "nurse": {"hi": "नर्स", "es": "enfermera", "de": "Krankenschwester"},
-    "hospital": {"hi": "अस्पताल", "es": "hospital", "de": "Krankenhaus"},
-}
+# Medical glossary shared with the server (see knowledge_store / medical_knowledge.json)
+knowledge = KnowledgeStore()
 
-def setup_translation_models():
-    print("🔧 Checking/installing translation models...")
-    argostranslate.package.update_package_index()
+def setup_translation_models(allow_download=False):
+    """
+    Loads the locally installed models, so startup works offline. Missing
+    models are only fetched from the package index with --install-models.
+    """
+    print("🔧 Checking translation models...")
     installed = argostranslate.package.get_installed_packages()
-    available = argostranslate.package.get_available_packages()
+    missing = [to_lang for to_lang in LANGUAGES.keys()
+               if not any(p.from_code == FROM_LANGUAGE_CODE and p.to_code == to_lang for p in installed)]
 
-    for to_lang in LANGUAGES.keys():
-        if not any(p.from_code == FROM_LANGUAGE_CODE and p.to_code == to_lang for p in installed):
+    if missing and allow_download:
+        argostranslate.package.update_package_index()
+        available = argostranslate.package.get_available_packages()
+        for to_lang in missing:
             pkg = next((p for p in available if p.from_code == FROM_LANGUAGE_CODE and p.to_code == to_lang), None)
             if pkg:
                 print(f"⬇️ Installing model: {FROM_LANGUAGE_CODE} → {to_lang}")
                 pkg.install()
             else:
                 print(f"❌ Model for {FROM_LANGUAGE_CODE} → {to_lang} not found")
+    elif missing:
+        print(f"⚠️ No installed model for {FROM_LANGUAGE_CODE} → {', '.join(missing)}; "
+              f"run with --install-models to download")
+
+    return ArgosBackend(preload=[(FROM_LANGUAGE_CODE, to_lang) for to_lang in LANGUAGES.keys()])
 
-def enhance_with_medical_terms(text, lang_code):
-    for term, translations in medical_glossary.items():
-        if term.lower() in text.lower() and lang_code in translations:
-            text = text.replace(term.lower(), translations[lang_code])
-    return text
+def translate_with_glossary(translator, text, from_code, to_code):
+    """Translates with glossary terms kept as their glossary forms, as the server does."""
+    return translate_protected(translator.translate, text, from_code, to_code, knowledge.current())
 
-def speak_text(text, lang_code):
+def speak_audio(audio, lang_code):
     try:
-        tts = gTTS(text=text, lang=lang_code)
-        filename = f"speech_{lang_code}.mp3"
-        tts.save(filename)
-        os.system(f"start {filename}" if sys.platform == "win32" else f"xdg-open {filename}")
+        if not play_mp3(audio):
+            print(f"🔇 No audio player found (install ffmpeg or mpg123) for {LANGUAGES[lang_code]}")
     except Exception as e:
-        print(f"❌ TTS Error: {e}")
+        print(f"❌ Playback Error: {e}")
 
 def main():
-    setup_translation_models()
-    recognizer = sr.Recognizer()
-
-    try:
-        with sr.Microphone() as source:
-            print("\n🎙️ Speak in English...")
-            recognizer.adjust_for_ambient_noise(source)
-            audio = recognizer.listen(source)
-            print("🧠 Recognizing using Whisper...")
-            text = recognizer.recognize_whisper(audio, language="english")
-            print(f"\n🗣️ You said: {text}")
-
-            # Translate and speak in each language
-            for lang_code, lang_name in LANGUAGES.items():
-                translated = argostranslate.translate.translate(text, FROM_LANGUAGE_CODE, lang_code)
-                translated = enhance_with_medical_terms(translated, lang_code)
+    """
+    Pipelined voice mode: speech is cut into segments at pauses, each segment
+    is recognised and shown as soon as it ends, and its translations and
+    speech for every language are produced concurrently in memory.
+    Pass --wav <file> to run on a recording instead of the microphone.
+    """
+    translator = setup_translation_models(allow_download="--install-models" in sys.argv)
 
-                print(f"\n🌍 Translated to {lang_name}: {translated}")
-                speak_text(translated, lang_code)
+    if "--wav" in sys.argv:
+        chunks, rate = wav_chunks(sys.argv[sys.argv.index("--wav") + 1])
+    else:
+        chunks, rate = microphone_chunks()
+        print("\n🎙️ Speak in English... (Ctrl+C to stop)")
 
-    except sr.UnknownValueError:
-        print("❌ Could not understand audio. Please try again.")
+    pipeline = VoicePipeline(whisper_recognizer(),
+                             lambda text, source, target: translate_with_glossary(translator, text, source, target),
+                             LANGUAGES.keys(), source_lang=FROM_LANGUAGE_CODE)
+    # Playback runs on its own thread so capture and recognition keep going.
+    player = ThreadPoolExecutor(max_workers=1)
+    try:
+        for event in pipeline.run(chunks, rate):
+            if event["event"] == "partial" and event["text"]:
+                print(f"\n🗣️ You said: {event['text']}  (whisper {event['timings']['asrMs']:.0f} ms)")
+            elif event["event"] == "translation":
+                timings = event["timings"]
+                print(f"🌍 {LANGUAGES[event['lang']]}: {event['text']}  "
+                      f"(mt {timings['mtMs']:.0f} ms, tts {timings['ttsMs']:.0f} ms, "
+                      f"{event['latencyMs']:.0f} ms after you paused)")
+                player.submit(speak_audio, event["audio"], event["lang"])
+            elif event["event"] == "error":
+                print(f"❌ {LANGUAGES[event['lang']]}: {event['error']}")
+            elif event["event"] == "done":
+                print(f"\n⏱️ Stage timings: {event['stages']}")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped.")
     except Exception as e:
         print(f"⚠️ Error: {e}")
+    finally:
+        pipeline.close()
+        player.shutdown(wait=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,59 @@
+from glossary_matcher import GlossaryMatcher, build_matchers
+
+ENGLISH = GlossaryMatcher({
+    "pain": "pain",
+    "chest pain": "chest pain",
+    "blood pressure": "blood pressure",
+    "low blood pressure": "low blood pressure",
+    "painkiller": "painkiller",
+    "fever": "fever",
+})
+
+
+def test_longest_match_wins_at_the_same_start():
+    assert ENGLISH.find("chest pain") == [(0, 10, "chest pain")]
+
+
+def test_leftmost_match_wins_over_a_later_longer_one():
+    text = "low blood pressure"
+    assert ENGLISH.find(text) == [(0, 18, "low blood pressure")]
+    assert ENGLISH.keys("her blood pressure is low") == ["blood pressure"]
+
+
+def test_matches_do_not_overlap():
+    text = "chest pain and low blood pressure"
+    assert [text[start:end] for start, end, _ in ENGLISH.find(text)] == ["chest pain", "low blood pressure"]
+
+
+def test_terms_inside_words_are_not_matched():
+    assert ENGLISH.find("spain") == []
+    assert ENGLISH.find("painful") == []
+    assert ENGLISH.keys("take a painkiller") == ["painkiller"]
+
+
+def test_matching_ignores_case_and_keeps_offsets():
+    text = "Severe FEVER, Chest Pain."
+    assert [(text[start:end], key) for start, end, key in ENGLISH.find(text)] == \
+        [("FEVER", "fever"), ("Chest Pain", "chest pain")]
+
+
+def test_keys_are_unique_in_order_of_appearance():
+    assert ENGLISH.keys("fever, pain, fever") == ["fever", "pain"]
+
+
+def test_scripts_without_spaces_match_inside_runs():
+    chinese = GlossaryMatcher({"发烧": "fever", "咳嗽": "cough"})
+    assert chinese.keys("病人发烧和咳嗽") == ["fever", "cough"]
+
+
+def test_devanagari_matches_stop_at_whole_grapheme_clusters():
+    hindi = GlossaryMatcher({"दवा": "medicine"})
+    assert hindi.keys("दवा लें") == ["medicine"]
+    # "दवाई" continues the word with a vowel sign, so it isn't a hit.
+    assert hindi.keys("दवाई लें") == []
+
+
+def test_build_matchers_compiles_one_matcher_per_language():
+    matchers = build_matchers({"fever": {"en": "fever", "es": "fiebre"}})
+    assert sorted(matchers) == ["en", "es"]
+    assert matchers["es"].keys("tiene fiebre") == ["fever"]
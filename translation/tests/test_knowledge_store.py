@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from knowledge_store import SOURCE_PATH, KnowledgeIndex, compile_knowledge, department_problems, form_problems
+from term_protection import protect_for
+
+
+def test_shipped_knowledge_compiles(tmp_path):
+    compile_knowledge(SOURCE_PATH, str(tmp_path / "knowledge.idx"))
+
+
+def test_mixed_script_and_duplicate_forms_are_reported():
+    problems = form_problems({
+        "pharmacy": {"forms": {"hi": "ফಾರ್মেসি"}},
+        "nausea": {"forms": {"zh": "头晕"}},
+        "dizziness": {"forms": {"zh": "头晕", "ja": "めまい"}},
+    })
+    assert problems == [
+        "pharmacy/hi: 'ফಾರ್মেসি' mixes Bengali, Kannada",
+        "dizziness/zh: '头晕' is also the form of 'nausea'",
+    ]
+
+
+def test_department_names_must_be_in_their_language_script():
+    problems = department_problems({
+        "Neurology": {"hi": "तंत्रिका-বিজ্ঞান", "de": "Neurologie"},
+        "Oncology": {"hi": "ক্যান্সার বিজ্ঞান"},
+        "ENT": {"hi": "ईएनटी"},
+    })
+    assert problems == [
+        "Neurology/hi: 'तंत्रिका-বিজ্ঞান' mixes Bengali, Devanagari",
+        "Oncology/hi: 'ক্যান্সার বিজ্ঞান' is not in a script hi is written in",
+    ]
+
+
+def test_build_refuses_invalid_department_names(tmp_path):
+    source = tmp_path / "knowledge.json"
+    source.write_text(json.dumps({
+        "version": "test",
+        "terms": {"fever": {"forms": {"hi": "बुखार"}, "departments": ["Neurology"]}},
+        "departments": {"Neurology": {"hi": "फेफড়া বিজ্ঞান"}},
+    }), encoding="utf-8")
+    with pytest.raises(ValueError, match="Neurology/hi"):
+        compile_knowledge(str(source), str(tmp_path / "knowledge.idx"))
+
+
+def test_terms_can_opt_out_of_protection(tmp_path):
+    source = tmp_path / "knowledge.json"
+    source.write_text(json.dumps({
+        "version": "test",
+        "terms": {
+            "fever": {"forms": {"en": "fever", "es": "fiebre"}},
+            "cold": {"protect": False, "forms": {"en": "cold", "es": "resfriado"}},
+        },
+    }), encoding="utf-8")
+    index = KnowledgeIndex(compile_knowledge(str(source), str(tmp_path / "knowledge.idx")))
+    assert index.protectable("fever", "es")
+    assert not index.protectable("cold", "en") and not index.protectable("cold", "es")
+    assert index.form("cold", "es") == "resfriado"
+
+
+def test_ambiguous_shipped_terms_are_left_to_the_engine(tmp_path):
+    index = KnowledgeIndex(compile_knowledge(SOURCE_PATH, str(tmp_path / "knowledge.idx")))
+    for text in ("Drink cold water", "The delivery is late", "Burn the letter", "The operation of the pump"):
+        assert protect_for(index, text, "en", "es") == (text, [])
+    assert protect_for(index, "fever and cold", "en", "es") == ("[[T0]] and cold", ["fiebre"])
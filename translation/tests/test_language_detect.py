@@ -0,0 +1,82 @@
+from glossary_matcher import GlossaryMatcher
+from language_detect import LanguageDetector
+
+
+class FakeRemote:
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return self.answers(text)
+
+
+def typed(text, step=3):
+    return [text[:end] for end in range(4, len(text) + 1, step)]
+
+
+def test_growing_prefixes_reuse_the_session_answer():
+    remote = FakeRemote(lambda text: ("es", 95))
+    detector = LanguageDetector(remote)
+    results = [detector.detect(prefix, session="s1") for prefix in typed("hola que tal estas")]
+    assert all(lang == "es" for lang, _ in results)
+    assert results[0][1] == "remote"
+    assert {via for _, via in results[1:]} <= {"prefix", "remote"}
+    # Only re-detected when the text doubles, not on every keystroke.
+    assert len(remote.calls) < len(results) / 2
+
+
+def test_text_is_redetected_once_it_has_doubled():
+    remote = FakeRemote(lambda text: ("es", 95))
+    detector = LanguageDetector(remote)
+    detector.detect("hola amigo", session="s1")
+    assert detector.detect("hola amigo que", session="s1") == ("es", "prefix")
+    assert detector.detect("hola amigo que tal estas", session="s1") == ("es", "remote")
+
+
+def test_fallback_answers_are_not_pinned():
+    remote = FakeRemote(lambda text: ("en", 0) if len(text) < 10 else ("es", 95))
+    detector = LanguageDetector(remote)
+    assert detector.detect("hola", session="s1") == ("en", "remote")
+    assert detector.detect("hola que tal", session="s1") == ("es", "remote")
+
+
+def test_prefix_path_needs_a_session():
+    remote = FakeRemote(lambda text: ("es", 95))
+    detector = LanguageDetector(remote)
+    detector.detect("hola amigo", session=None)
+    assert detector.detect("hola amigo que", session=None) == ("es", "remote")
+
+
+def test_sessions_are_kept_apart():
+    remote = FakeRemote(lambda text: ("es", 95) if text.startswith("hola") else ("it", 95))
+    detector = LanguageDetector(remote)
+    detector.detect("hola amigo", session="a")
+    assert detector.detect("ciao amico", session="b") == ("it", "remote")
+    assert detector.detect("hola amigo mio", session="a") == ("es", "prefix")
+
+
+def test_a_new_script_ends_the_prefix_answer():
+    remote = FakeRemote(lambda text: ("en", 95))
+    detector = LanguageDetector(remote)
+    detector.detect("hello there", session="s1")
+    assert detector.detect("hello there बुखार", session="s1")[1] == "remote"
+    assert len(remote.calls) == 2
+
+
+def test_single_language_scripts_and_glossary_hits_stay_local():
+    remote = FakeRemote(lambda text: ("en", 95))
+    matchers = {"es": GlossaryMatcher({"fiebre": "fever", "tos": "cough"})}
+    detector = LanguageDetector(remote, matchers)
+    assert detector.detect("मुझे बुखार है") == ("hi", "script")
+    assert detector.detect("tiene fiebre y tos") == ("es", "glossary")
+    assert remote.calls == []
+
+
+def test_repeated_text_is_served_from_the_remote_cache():
+    remote = FakeRemote(lambda text: ("de", 90))
+    detector = LanguageDetector(remote)
+    detector.detect("guten morgen")
+    assert detector.detect("guten morgen") == ("de", "cache")
+    assert len(remote.calls) == 1
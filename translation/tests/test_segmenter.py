@@ -0,0 +1,49 @@
+from segmenter import split_sentences, unwrap_lines
+
+OCR_TEXT = (
+    "Patient was seen by Dr. Smith on Monday. She reports a severe\n"
+    "headache and nausea since the\n"
+    "weekend.\n"
+    "\n"
+    "Plan: rest and fluids.\n"
+    "Review in 3.5 weeks!"
+)
+
+
+def test_segments_rebuild_the_original_text():
+    assert "".join(split_sentences(OCR_TEXT)) == OCR_TEXT
+
+
+def test_wrapped_lines_stay_in_one_sentence():
+    sentences = [unwrap_lines(segment) for segment in split_sentences(OCR_TEXT)]
+    assert sentences == [
+        "Patient was seen by Dr. Smith on Monday.",
+        "She reports a severe headache and nausea since the weekend.",
+        "Plan: rest and fluids.",
+        "Review in 3.5 weeks!",
+    ]
+
+
+def test_blank_lines_end_a_segment_without_punctuation():
+    segments = split_sentences("Diagnosis\n\nAcute bronchitis")
+    assert [unwrap_lines(segment) for segment in segments] == ["Diagnosis", "Acute bronchitis"]
+
+
+def test_a_single_newline_is_not_a_sentence_end():
+    assert len(split_sentences("Take one tablet\nafter meals")) == 1
+
+
+def test_abbreviations_do_not_end_sentences():
+    assert len(split_sentences("Ask Dr. Rao or Prof. Lee, e.g. Monday.")) == 1
+
+
+def test_cjk_sentences_split_without_spaces_and_join_without_spaces():
+    segments = split_sentences("頭痛が\nひどい。熱もある。")
+    assert [unwrap_lines(segment) for segment in segments] == ["頭痛がひどい。", "熱もある。"]
+
+
+def test_long_segments_are_cut_at_spaces():
+    text = "word " * 50
+    segments = split_sentences(text, max_chars=40)
+    assert "".join(segments) == text
+    assert all(len(segment) <= 40 for segment in segments)
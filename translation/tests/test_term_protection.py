@@ -0,0 +1,100 @@
+from glossary_matcher import GlossaryMatcher
+from term_protection import protect_terms, restore_terms, translate_protected
+
+MATCHER = GlossaryMatcher({"fever": "fever", "cough": "cough", "chest pain": "chest pain"})
+SPANISH = {"fever": "fiebre", "cough": "tos", "chest pain": "dolor en el pecho"}
+
+
+def test_protect_replaces_terms_with_numbered_placeholders():
+    protected, forms = protect_terms("Fever and chest pain since Monday", MATCHER, SPANISH.get)
+    assert protected == "[[T0]] and [[T1]] since Monday"
+    assert forms == ["Fiebre", "dolor en el pecho"]
+
+
+def test_terms_without_a_target_form_are_left_alone():
+    protected, forms = protect_terms("fever and cough", MATCHER, {"fever": "fiebre"}.get)
+    assert protected == "[[T0]] and cough"
+    assert forms == ["fiebre"]
+
+
+def test_text_with_its_own_placeholders_is_not_protected():
+    for text in ("fever, see [[T0]]", "cough [ [t1] ]"):
+        assert protect_terms(text, MATCHER, SPANISH.get) == (text, [])
+
+
+def test_round_trip_restores_every_form():
+    protected, forms = protect_terms("fever and cough", MATCHER, SPANISH.get)
+    restored, complete = restore_terms(protected.replace(" and ", " y "), forms)
+    assert (restored, complete) == ("fiebre y tos", True)
+
+
+def test_restore_tolerates_spacing_and_case_changes():
+    restored, complete = restore_terms("[ [t0] ] y [[ T1 ]]", ["fiebre", "tos"])
+    assert (restored, complete) == ("fiebre y tos", True)
+
+
+def test_restore_reports_a_lost_placeholder():
+    restored, complete = restore_terms("fiebre y [[T1]]", ["fiebre", "tos"])
+    assert restored == "fiebre y tos"
+    assert not complete
+
+
+def test_unknown_placeholder_numbers_are_kept():
+    assert restore_terms("[[T5]]", ["fiebre"]) == ("[[T5]]", False)
+
+
+class FakeIndex:
+    def __init__(self, forms, unprotectable=()):
+        self.forms = forms
+        self.unprotectable = set(unprotectable)
+
+    def matcher(self, lang):
+        return MATCHER if lang == "en" else None
+
+    def form(self, key, lang):
+        return self.forms.get(key)
+
+    def protectable(self, key, lang):
+        return (key, lang) not in self.unprotectable
+
+
+def test_translate_protected_keeps_glossary_forms():
+    calls = []
+
+    def translate(text, source, target):
+        calls.append(text)
+        return text.replace(" and ", " y ")
+
+    assert translate_protected(translate, "fever and cough", "en", "es", FakeIndex(SPANISH)) == "fiebre y tos"
+    assert calls == ["[[T0]] and [[T1]]"]
+
+
+def test_translate_protected_retries_without_placeholders_when_one_is_lost():
+    calls = []
+
+    def translate(text, source, target):
+        calls.append(text)
+        return "fiebre y tos" if "[[" not in text else "algo y [[T1]]"
+
+    assert translate_protected(translate, "fever and cough", "en", "es", FakeIndex(SPANISH)) == "fiebre y tos"
+    assert calls == ["[[T0]] and [[T1]]", "fever and cough"]
+
+
+def test_unprotectable_forms_are_left_to_the_engine():
+    index = FakeIndex(SPANISH, unprotectable={("cough", "es")})
+    calls = []
+
+    def translate(text, source, target):
+        calls.append(text)
+        return text
+
+    translate_protected(translate, "fever and cough", "en", "es", index)
+    assert calls == ["[[T0]] and cough"]
+
+
+def test_user_placeholders_survive_translation():
+    def translate(text, source, target):
+        return text.replace(" and ", " y ")
+
+    result = translate_protected(translate, "fever and [[T0]]", "en", "es", FakeIndex(SPANISH))
+    assert result == "fever y [[T0]]"
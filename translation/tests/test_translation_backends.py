@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import OrderedDict
+
+import pytest
+
+from translation_backends import ArgosBackend, MicroBatcher, _LoadedPair
+
+
+def run_threads(targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.002)
+    for thread in threads:
+        thread.join()
+
+
+def test_concurrent_calls_share_batches():
+    batches = []
+
+    def run_batch(texts):
+        batches.append(list(texts))
+        time.sleep(0.02)
+        return [text.upper() for text in texts]
+
+    batcher = MicroBatcher(run_batch, window=0.01, max_batch=4)
+    results = {}
+    run_threads([lambda i=i: results.update({i: batcher.submit(f"t{i}")}) for i in range(10)])
+    assert results == {i: f"T{i}" for i in range(10)}
+    assert all(len(batch) <= 4 for batch in batches)
+    assert len(batches) < 10
+    assert (batcher.batches, batcher.items, batcher.busy) == (len(batches), 10, False)
+
+
+def test_first_caller_returns_with_its_own_batch():
+    def run_batch(texts):
+        time.sleep(0.05)
+        return texts
+
+    batcher = MicroBatcher(run_batch, window=0.005, max_batch=1)
+    latency = {}
+
+    def call(i):
+        started = time.perf_counter()
+        batcher.submit(i)
+        latency[i] = time.perf_counter() - started
+
+    run_threads([lambda i=i: call(i) for i in range(6)])
+    # Six one-item batches take 0.3 s; the first caller only waits for its own.
+    assert latency[0] < 0.15
+    assert max(latency.values()) > 0.25
+
+
+def test_batch_errors_reach_every_caller():
+    def run_batch(texts):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(run_batch, window=0)
+    with pytest.raises(RuntimeError, match="model failed"):
+        batcher.submit("x")
+    assert not batcher.busy
+
+
+class FakeTranslator:
+    def __init__(self):
+        self.unloaded = False
+
+    def unload_model(self):
+        self.unloaded = True
+
+
+class FakeArgos(ArgosBackend):
+    """ArgosBackend over fake models: translate_batch sleeps and tags the text."""
+
+    def __init__(self, pairs, max_loaded_pairs, latency=0.05):
+        self.max_loaded_pairs = max_loaded_pairs
+        self.idle_seconds = 600.0
+        self.batch_window = 0.001
+        self.max_batch = 8
+        self.batched = True
+        self.latency = latency
+        self._packages = {pair: None for pair in pairs}
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.loads = 0
+        self.evictions = 0
+
+    def _load(self, source, target):
+        translator = FakeTranslator()
+
+        def run_batch(texts):
+            time.sleep(self.latency)
+            if translator.unloaded:
+                raise RuntimeError("model unloaded")
+            return [f"{target}:{text}" for text in texts]
+
+        return _LoadedPair(None, translator, MicroBatcher(run_batch, window=self.batch_window))
+
+
+def test_a_pair_is_not_evicted_before_its_caller_submits():
+    backend = FakeArgos([("en", "es"), ("en", "de")], max_loaded_pairs=1)
+    results = {}
+    run_threads([
+        lambda: results.update(es=backend.translate("fever", "en", "es")),
+        lambda: results.update(de=backend.translate("fever", "en", "de")),
+    ])
+    assert results == {"es": "es:fever", "de": "de:fever"}
+    # Once both are idle the next call brings the cache back under the limit.
+    backend.translate("cough", "en", "de")
+    assert list(backend._loaded) == [("en", "de")]
+    assert backend.evictions == 1
+
+
+def test_idle_pairs_are_evicted_least_recently_used_first():
+    backend = FakeArgos([("en", "es"), ("en", "de"), ("en", "hi")], max_loaded_pairs=2, latency=0)
+    for target in ("es", "de", "hi"):
+        backend.translate("fever", "en", target)
+    assert list(backend._loaded) == [("en", "de"), ("en", "hi")]
+
+
+def test_pivot_through_english():
+    backend = FakeArgos([("es", "en"), ("en", "de")], max_loaded_pairs=1, latency=0)
+    assert backend.translate("fiebre", "es", "de") == "de:en:fiebre"
@@ -0,0 +1,20 @@
+from translation_cache import make_key, normalize_text
+
+
+def test_spaces_and_tabs_collapse():
+    assert normalize_text("  fever \t and  cough ") == "fever and cough"
+
+
+def test_line_breaks_are_part_of_the_key():
+    assert normalize_text("A\n\nB") == "A\n\nB"
+    assert make_key("A\n\nB", "en", "es", "m") != make_key("A B", "en", "es", "m")
+    assert make_key("A\nB", "en", "es", "m") != make_key("A\n\nB", "en", "es", "m")
+
+
+def test_line_endings_and_spaces_around_breaks_are_normalized():
+    assert normalize_text("A \r\n  B") == "A\nB"
+
+
+def test_unicode_forms_share_a_key():
+    composed, decomposed = "fi\u00e8vre", "fie\u0300vre"
+    assert make_key(composed, "fr", "en", "m") == make_key(decomposed, "fr", "en", "m")
@@ -0,0 +1,420 @@
+"""
+Translation backends behind one interface, so the server can translate
+through a LibreTranslate HTTP server or in-process with Argos Translate.
+
+Every backend has `translate(q, source, target)`, `detect(q)`,
+`languages()`, `stats()`, `close()`, plus `name` and `model_version`;
+model_version goes into translation cache keys so switching backends or
+models never serves another model's output.
+
+Select one with TRANSLATION_BACKEND=libretranslate (default) or argos;
+see `backend_from_env` for the Argos settings.
+"""
+import hashlib
+import importlib.metadata
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TranslationBackend:
+    name = "base"
+    model_version = "base"
+
+    def translate(self, q, source="en", target="es"):
+        raise NotImplementedError
+
+    def detect(self, q):
+        """LibreTranslate-style [{"language", "confidence"}], best first."""
+        return []
+
+    def languages(self):
+        return []
+
+    def stats(self):
+        return {"backend": self.name, "modelVersion": self.model_version}
+
+    def close(self):
+        pass
+
+
+class LibreTranslateBackend(TranslationBackend):
+    """Forwards to a LibreTranslate server through LibreTranslateAPI."""
+
+    name = "libretranslate"
+
+    def __init__(self, lt, model_version="libretranslate"):
+        self.lt = lt
+        self.model_version = model_version
+
+    def translate(self, q, source="en", target="es"):
+        return self.lt.translate(q, source=source, target=target)
+
+    def detect(self, q):
+        return self.lt.detect(q)
+
+    def languages(self):
+        return self.lt.languages()
+
+    def close(self):
+        self.lt.close()
+
+
+class _Pending:
+    __slots__ = ("text", "wake", "finished", "result", "error")
+
+    def __init__(self, text):
+        self.text = text
+        self.wake = threading.Event()
+        self.finished = False
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent calls into batches. The first caller to arrive
+    while no batch is running waits `window` seconds for others to join
+    and runs `run_batch(texts)` for up to `max_batch` queued calls. When
+    its own call is done it hands the rest of the queue to the oldest
+    waiting caller, which runs the next batch the same way, so no caller
+    waits on batches that don't contain its text.
+    """
+
+    def __init__(self, run_batch, window=0.005, max_batch=32):
+        self.run_batch = run_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._queue = []
+        self._running = False
+        self.batches = 0
+        self.items = 0
+
+    @property
+    def busy(self):
+        return self._running or bool(self._queue)
+
+    def submit(self, text):
+        item = _Pending(text)
+        with self._lock:
+            self._queue.append(item)
+            leader = not self._running
+            self._running = True
+        if leader and self.window:
+            time.sleep(self.window)
+        if not leader:
+            item.wake.wait()
+        if not item.finished:
+            # First caller, or handed the queue by the previous leader.
+            self._run_next_batch()
+            self._hand_off()
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _run_next_batch(self):
+        with self._lock:
+            batch = self._queue[:self.max_batch]
+            del self._queue[:self.max_batch]
+        try:
+            results = self.run_batch([item.text for item in batch])
+        except Exception as e:
+            results = None
+            for item in batch:
+                item.error = e
+        self.batches += 1
+        self.items += len(batch)
+        for i, item in enumerate(batch):
+            if results is not None:
+                item.result = results[i]
+            item.finished = True
+            item.wake.set()
+
+    def _hand_off(self):
+        with self._lock:
+            if self._queue:
+                self._queue[0].wake.set()
+            else:
+                self._running = False
+
+
+class _LoadedPair:
+    def __init__(self, translation, translator, batcher):
+        self.translation = translation
+        self.translator = translator
+        self.batcher = batcher
+        self.last_used = time.monotonic()
+        self.users = 0  # callers between _pair and the end of their submit
+
+
+# argostranslate releases whose internals _translate_batch relies on
+# (PackageTranslation.sentencizer, Package.tokenizer and target_prefix).
+# Other versions translate one text at a time through the public API.
+BATCHED_ARGOS_VERSIONS = ("1.9.",)
+
+
+def argos_supports_batching():
+    try:
+        version = importlib.metadata.version("argostranslate")
+    except importlib.metadata.PackageNotFoundError:
+        return False
+    if version.startswith(BATCHED_ARGOS_VERSIONS):
+        return True
+    print(f"argostranslate {version} is not a tested version for batched translation; "
+          "translating one text at a time")
+    return False
+
+
+class ArgosBackend(TranslationBackend):
+    """
+    In-process Argos Translate models, built only from locally installed
+    packages (no package index download), so it starts fully offline.
+
+    `preload` lists (source, target) pairs to load at startup ("all" loads
+    every installed pair); other pairs load on first use. At most
+    `max_loaded_pairs` stay in memory and pairs idle for `idle_seconds`
+    are unloaded, least recently used first. Concurrent requests for the
+    same pair are batched into one CTranslate2 call. Pairs without a
+    direct model pivot through English when both halves are installed.
+    """
+
+    name = "argos"
+
+    def __init__(self, preload=(), max_loaded_pairs=4, idle_seconds=600.0,
+                 batch_window=0.005, max_batch=32):
+        import argostranslate.package
+
+        self.max_loaded_pairs = max_loaded_pairs
+        self.idle_seconds = idle_seconds
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.batched = argos_supports_batching()
+        self._packages = {
+            (pkg.from_code, pkg.to_code): pkg
+            for pkg in argostranslate.package.get_installed_packages()
+            if getattr(pkg, "type", "translate") == "translate"
+        }
+        versions = ",".join(f"{s}-{t}:{pkg.package_version}" for (s, t), pkg in sorted(self._packages.items()))
+        self.model_version = "argos-" + hashlib.sha256(versions.encode()).hexdigest()[:12]
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.loads = 0
+        self.evictions = 0
+
+        if preload == "all":
+            preload = list(self._packages)
+        for source, target in preload:
+            if (source, target) in self._packages:
+                self._release(self._pair(source, target))
+            else:
+                print(f"Argos model {source} -> {target} is not installed; skipping preload")
+
+    # --- Model loading and eviction ---
+
+    def _load(self, source, target):
+        import ctranslate2
+        from argostranslate import settings
+        from argostranslate.translate import Language, PackageTranslation
+
+        pkg = self._packages[(source, target)]
+        translation = PackageTranslation(Language(source, pkg.from_name), Language(target, pkg.to_name), pkg)
+        translator = ctranslate2.Translator(
+            str(pkg.package_path / "model"),
+            device=settings.device,
+            inter_threads=settings.inter_threads,
+            intra_threads=settings.intra_threads,
+            compute_type=settings.compute_type,
+        )
+        translation.translator = translator
+
+        def run_batch(texts):
+            if self.batched:
+                return self._translate_batch(translation, texts)
+            return [translation.translate(text) for text in texts]
+
+        return _LoadedPair(translation, translator,
+                           MicroBatcher(run_batch, window=self.batch_window, max_batch=self.max_batch))
+
+    def _pair(self, source, target):
+        """The loaded pair, counted as in use (so never evicted) until `_release`."""
+        key = (source, target)
+        with self._lock:
+            pair = self._loaded.get(key)
+            if pair is not None:
+                self._loaded.move_to_end(key)
+                pair.last_used = time.monotonic()
+                pair.users += 1
+                return pair
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the main lock so other pairs keep serving meanwhile.
+        with load_lock:
+            with self._lock:
+                pair = self._loaded.get(key)
+                if pair is not None:
+                    pair.users += 1
+            if pair is None:
+                started = time.perf_counter()
+                pair = self._load(source, target)
+                print(f"Loaded Argos model {source} -> {target} in {time.perf_counter() - started:.2f}s")
+                with self._lock:
+                    self._loaded[key] = pair
+                    pair.users += 1
+                    self.loads += 1
+                    self._evict()
+        pair.last_used = time.monotonic()
+        return pair
+
+    def _release(self, pair):
+        with self._lock:
+            pair.users -= 1
+
+    def _submit(self, source, target, q):
+        pair = self._pair(source, target)
+        try:
+            return pair.batcher.submit(q)
+        finally:
+            self._release(pair)
+
+    def _evict(self):
+        # Caller holds self._lock. Only idle pairs are unloaded; a pair that a
+        # caller is about to use or has a batch in flight stays until a later
+        # call finds it idle.
+        now = time.monotonic()
+        for key, pair in list(self._loaded.items()):
+            over_capacity = len(self._loaded) > self.max_loaded_pairs
+            stale = now - pair.last_used > self.idle_seconds
+            if not (over_capacity or stale):
+                break
+            if pair.users or pair.batcher.busy:
+                continue
+            del self._loaded[key]
+            self.evictions += 1
+            unload = getattr(pair.translator, "unload_model", None)
+            if unload is not None:
+                unload()
+
+    # --- Translation ---
+
+    def _translate_batch(self, translation, texts):
+        """
+        Translates several texts with one translate_batch call: every
+        paragraph of every text is sentence-split and tokenized, the
+        sentences are translated together, and the output is regrouped.
+        Mirrors argostranslate.translate.apply_packaged_translation, so it
+        is only used with BATCHED_ARGOS_VERSIONS.
+        """
+        from argostranslate import settings
+
+        pkg = translation.pkg
+        sentences, layout = [], []
+        for text in texts:
+            paragraphs = []
+            for paragraph in text.split("\n"):
+                split = translation.sentencizer.split_sentences(paragraph) if paragraph.strip() else []
+                paragraphs.append((len(sentences), len(split)))
+                sentences.extend(split)
+            layout.append(paragraphs)
+
+        tokenized = [pkg.tokenizer.encode(sentence) for sentence in sentences]
+        results = []
+        if tokenized:
+            target_prefix = [[pkg.target_prefix]] * len(tokenized) if pkg.target_prefix else None
+            results = translation.translator.translate_batch(
+                tokenized,
+                target_prefix=target_prefix,
+                replace_unknowns=True,
+                max_batch_size=settings.batch_size,
+                batch_type="tokens",
+                beam_size=settings.beam_size,
+                num_hypotheses=1,
+                length_penalty=0.2,
+            )
+
+        translated = []
+        for paragraphs in layout:
+            out = []
+            for first, count in paragraphs:
+                tokens = [token for result in results[first:first + count] for token in result.hypotheses[0]]
+                value = pkg.tokenizer.decode(tokens) if tokens else ""
+                if pkg.target_prefix and value.startswith(pkg.target_prefix):
+                    value = value[len(pkg.target_prefix):]
+                out.append(value[1:] if value.startswith(" ") else value)
+            translated.append("\n".join(out))
+        return translated
+
+    def _route(self, source, target):
+        if (source, target) in self._packages:
+            return [(source, target)]
+        if (source, "en") in self._packages and ("en", target) in self._packages:
+            return [(source, "en"), ("en", target)]
+        raise ValueError(f"No installed Argos model for {source} -> {target}")
+
+    def translate(self, q, source="en", target="es"):
+        if source == target or not q.strip():
+            return q
+        for source, target in self._route(source, target):
+            q = self._submit(source, target, q)
+        with self._lock:
+            self._evict()
+        return q
+
+    def languages(self):
+        names = {}
+        for pkg in self._packages.values():
+            names.setdefault(pkg.from_code, pkg.from_name)
+            names.setdefault(pkg.to_code, pkg.to_name)
+        return [{"code": code, "name": name} for code, name in sorted(names.items())]
+
+    def stats(self):
+        with self._lock:
+            loaded = {f"{s}-{t}": {"idleSeconds": round(time.monotonic() - pair.last_used, 1),
+                                   "batches": pair.batcher.batches, "items": pair.batcher.items}
+                      for (s, t), pair in self._loaded.items()}
+        return {
+            **super().stats(),
+            "installed": sorted(f"{s}-{t}" for s, t in self._packages),
+            "loaded": loaded,
+            "maxLoadedPairs": self.max_loaded_pairs,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            for pair in self._loaded.values():
+                unload = getattr(pair.translator, "unload_model", None)
+                if unload is not None:
+                    unload()
+            self._loaded.clear()
+
+
+def parse_pairs(value):
+    """"en:es,en:hi" -> [("en", "es"), ("en", "hi")]; "all" passes through."""
+    value = (value or "").strip()
+    if value == "all":
+        return value
+    return [tuple(item.split(":", 1)) for item in value.split(",") if ":" in item]
+
+
+def backend_from_env(lt):
+    """
+    Builds the backend named by TRANSLATION_BACKEND. For argos:
+    ARGOS_PRELOAD ("en:es,en:hi" or "all"), ARGOS_MAX_LOADED_PAIRS,
+    ARGOS_IDLE_SECONDS, ARGOS_BATCH_WINDOW_MS and ARGOS_MAX_BATCH.
+    """
+    backend = os.environ.get("TRANSLATION_BACKEND", "libretranslate").lower()
+    if backend == "argos":
+        return ArgosBackend(
+            preload=parse_pairs(os.environ.get("ARGOS_PRELOAD")),
+            max_loaded_pairs=int(os.environ.get("ARGOS_MAX_LOADED_PAIRS", "4")),
+            idle_seconds=float(os.environ.get("ARGOS_IDLE_SECONDS", "600")),
+            batch_window=float(os.environ.get("ARGOS_BATCH_WINDOW_MS", "5")) / 1000,
+            max_batch=int(os.environ.get("ARGOS_MAX_BATCH", "32")),
+        )
+    if backend != "libretranslate":
+        raise ValueError(f"Unknown TRANSLATION_BACKEND {backend!r} (use libretranslate or argos)")
+    return LibreTranslateBackend(lt)
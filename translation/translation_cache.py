@@ -0,0 +1,240 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+_HORIZONTAL_SPACE = re.compile(r"[^\S\n]+")
+_SPACE_AROUND_NEWLINE = re.compile(r" ?\n ?")
+
+
+def normalize_text(text):
+    """
+    Cache-key form of `text`: NFC, runs of spaces and tabs collapsed, ends
+    trimmed. Line breaks are kept, since translations keep the layout.
+    """
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    return _SPACE_AROUND_NEWLINE.sub("\n", _HORIZONTAL_SPACE.sub(" ", text)).strip()
+
+
+def make_key(text, source, target, model_version):
+    raw = "\x1f".join((model_version, source, target, normalize_text(text)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryLRU:
+    """Bounded in-process LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries=2048, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, stored_at=None):
+        with self._lock:
+            self._entries[key] = (value, stored_at or time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteTier:
+    """
+    On-disk tier shared by every worker process on the host. SQLite's WAL
+    mode lets readers proceed while another process writes.
+    """
+
+    def __init__(self, path, max_entries=100000, ttl=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS translations_accessed ON translations (accessed_at)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def get(self, key):
+        conn = self._conn()
+        row = conn.execute("SELECT value, stored_at FROM translations WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, stored_at = row
+        now = time.time()
+        if self.ttl is not None and now - stored_at > self.ttl:
+            conn.execute("DELETE FROM translations WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE translations SET accessed_at = ? WHERE key = ?", (now, key))
+        return value, stored_at
+
+    def set(self, key, value):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO translations (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, now, now),
+        )
+        self._writes += 1
+        # Trimming scans the index, so only do it every so often.
+        if self._writes % 256 == 0:
+            self.trim()
+
+    def trim(self):
+        conn = self._conn()
+        if self.ttl is not None:
+            conn.execute("DELETE FROM translations WHERE stored_at < ?", (time.time() - self.ttl,))
+        conn.execute(
+            "DELETE FROM translations WHERE key IN ("
+            " SELECT key FROM translations ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        self._conn().execute("DELETE FROM translations")
+
+
+class TranslationCache:
+    """
+    Two-tier cache for machine translations keyed on
+    (normalized text, source, target, model version). `variant` separates
+    outputs of the same model produced differently, e.g. with glossary
+    term protection at a given glossary version.
+    """
+
+    def __init__(self, max_entries=2048, ttl=None, db_path=None, db_max_entries=100000, model_version="default"):
+        self.model_version = model_version
+        self.memory = MemoryLRU(max_entries, ttl)
+        self.disk = SQLiteTier(db_path, db_max_entries, ttl) if db_path else None
+        self._lock = threading.Lock()
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "errors": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def _key(self, text, source, target, variant):
+        version = f"{self.model_version}\x1f{variant}" if variant else self.model_version
+        return make_key(text, source, target, version)
+
+    def get(self, text, source, target, variant=""):
+        key = self._key(text, source, target, variant)
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+        if self.disk is not None:
+            try:
+                row = self.disk.get(key)
+            except sqlite3.Error as e:
+                print(f"Translation cache read error: {e}")
+                self._count("errors")
+                row = None
+            if row is not None:
+                value, stored_at = row
+                self.memory.set(key, value, stored_at)
+                self._count("disk_hits")
+                return value
+        self._count("misses")
+        return None
+
+    def set(self, text, source, target, value, variant=""):
+        key = self._key(text, source, target, variant)
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except sqlite3.Error as e:
+                print(f"Translation cache write error: {e}")
+                self._count("errors")
+
+    def translate(self, translate_fn, text, source, target, variant=""):
+        """Returns (translation, hit) and fills the cache on a miss."""
+        cached = self.get(text, source, target, variant)
+        if cached is not None:
+            return cached, True
+        translated = translate_fn(text, source=source, target=target)
+        self.set(text, source, target, translated, variant)
+        return translated, False
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["memory_hits"] + counts["disk_hits"] + counts["misses"]
+        stats = {
+            **counts,
+            "lookups": lookups,
+            "hit_rate": (lookups - counts["misses"]) / lookups if lookups else 0.0,
+            "model_version": self.model_version,
+            "ttl": self.memory.ttl,
+            "memory": {"entries": len(self.memory), "max_entries": self.memory.max_entries,
+                       "evictions": self.memory.evictions},
+            "disk": None,
+        }
+        if self.disk is not None:
+            try:
+                entries = len(self.disk)
+            except sqlite3.Error:
+                entries = None
+            stats["disk"] = {"path": self.disk.path, "entries": entries, "max_entries": self.disk.max_entries}
+        return stats
+
+
+def cache_from_env(model_version="libretranslate"):
+    """
+    Builds the cache from TRANSLATION_CACHE_* environment variables.
+    Leave TRANSLATION_CACHE_DB empty to keep the cache in memory only.
+    `model_version` is the translation backend's; TRANSLATION_MODEL_VERSION
+    overrides it.
+    """
+    ttl = os.environ.get("TRANSLATION_CACHE_TTL")
+    return TranslationCache(
+        max_entries=int(os.environ.get("TRANSLATION_CACHE_SIZE", "2048")),
+        ttl=float(ttl) if ttl else None,
+        db_path=os.environ.get("TRANSLATION_CACHE_DB") or None,
+        db_max_entries=int(os.environ.get("TRANSLATION_CACHE_DB_SIZE", "100000")),
+        model_version=os.environ.get("TRANSLATION_MODEL_VERSION", model_version),
+    )
@@ -0,0 +1,386 @@
+"""
+Pipelined voice translation: audio -> speech segments -> transcript ->
+per-language translation and speech.
+
+Audio arrives as 16-bit mono PCM chunks (from a WAV file or the
+microphone). An energy-based VAD cuts it into utterance segments as soon
+as the speaker pauses, so recognition of one segment overlaps with
+capture of the next. Each transcript is emitted right away as a partial
+result, and its translation and text-to-speech run concurrently for all
+target languages. Synthesized MP3 audio stays in memory.
+
+Every event carries per-stage timings (asrMs, mtMs, ttsMs) and the
+latency from the end of the segment to its audio being ready.
+"""
+import array
+import io
+import math
+import shutil
+import subprocess
+import sys
+import time
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+FRAME_MS = 30
+SAMPLE_WIDTH = 2
+
+
+# --- Audio sources ---
+
+def read_wav(path):
+    """Returns (16-bit mono PCM bytes, sample rate) for a PCM WAV file."""
+    with wave.open(path, "rb") as f:
+        rate, channels, width = f.getframerate(), f.getnchannels(), f.getsampwidth()
+        data = f.readframes(f.getnframes())
+    if width == 1:
+        samples = array.array("h", ((b - 128) << 8 for b in data))
+    elif width == 2:
+        samples = array.array("h", data)
+    else:
+        raise ValueError(f"{path}: only 8- and 16-bit PCM WAV files are supported")
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if channels > 1:
+        samples = array.array("h", (sum(samples[i:i + channels]) // channels
+                                    for i in range(0, len(samples), channels)))
+    return samples.tobytes(), rate
+
+
+def wav_chunks(path, chunk_ms=FRAME_MS, realtime=False):
+    """
+    Yields (PCM chunks, rate) for a WAV file. With `realtime` the chunks are
+    paced like a live microphone, which makes latencies comparable.
+    """
+    pcm, rate = read_wav(path)
+    chunk_bytes = rate * chunk_ms // 1000 * SAMPLE_WIDTH
+
+    def chunks():
+        started = time.perf_counter()
+        for i, offset in enumerate(range(0, len(pcm), chunk_bytes)):
+            if realtime:
+                delay = started + i * chunk_ms / 1000 - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            yield pcm[offset:offset + chunk_bytes]
+
+    return chunks(), rate
+
+
+def microphone_chunks(sample_rate=16000):
+    """Yields (PCM chunks, rate) from the default microphone until interrupted."""
+    import speech_recognition as sr
+
+    microphone = sr.Microphone(sample_rate=sample_rate)
+
+    def chunks():
+        with microphone as source:
+            while True:
+                yield source.stream.read(source.CHUNK)
+
+    return chunks(), sample_rate
+
+
+# --- Voice activity detection ---
+
+class Segment:
+    def __init__(self, index, pcm, rate, start_ms, end_ms):
+        self.index = index
+        self.pcm = pcm
+        self.rate = rate
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.closed_at = time.perf_counter()
+        self.text = None
+        self.asr_ms = None
+        self.outputs = {}
+
+
+def _rms(frame):
+    samples = array.array("h", frame)
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class SpeechSegmenter:
+    """
+    Energy VAD. A frame is speech when its RMS is well above the running
+    noise floor. The floor starts at the quietest frame of the first
+    `warmup_ms` (held back until then), capped at `min_rms`, so a speaker
+    who starts talking straight away doesn't become the floor; a segment
+    that runs to `max_segment_ms` without a quiet frame raises it to that
+    segment's quietest frame. A segment closes after `silence_ms` of
+    non-speech or at
+    `max_segment_ms`. Segments shorter than `min_speech_ms` of speech are
+    dropped as clicks. `preroll_ms` of audio before the onset is kept so
+    the first syllable isn't clipped.
+    """
+
+    def __init__(self, rate, frame_ms=FRAME_MS, silence_ms=450, min_speech_ms=200,
+                 max_segment_ms=8000, preroll_ms=150, min_rms=300.0, ratio=3.0, warmup_ms=300):
+        self.rate = rate
+        self.frame_ms = frame_ms
+        self.frame_bytes = rate * frame_ms // 1000 * SAMPLE_WIDTH
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_frames = max(1, max_segment_ms // frame_ms)
+        self.min_rms = min_rms
+        self.ratio = ratio
+        self.noise_floor = None
+        self.warmup_frames = max(1, warmup_ms // frame_ms)
+        self._warmup = []
+        self._quietest = 0.0
+        self._buffer = b""
+        self._preroll = deque(maxlen=max(0, preroll_ms // frame_ms))
+        self._frames = []
+        self._speech_frames = 0
+        self._silent_run = 0
+        self._frame_no = 0
+        self._start_frame = 0
+        self.segments = 0
+
+    def feed(self, chunk):
+        """Adds audio and returns any segments that closed."""
+        self._buffer += chunk
+        closed = []
+        while len(self._buffer) >= self.frame_bytes:
+            frame, self._buffer = self._buffer[:self.frame_bytes], self._buffer[self.frame_bytes:]
+            if self.noise_floor is None:
+                self._warmup.append(frame)
+                if len(self._warmup) >= self.warmup_frames:
+                    closed.extend(self._end_warmup())
+                continue
+            segment = self._add_frame(frame)
+            if segment is not None:
+                closed.append(segment)
+        return closed
+
+    def _end_warmup(self):
+        frames, self._warmup = self._warmup, []
+        self.noise_floor = min([_rms(frame) for frame in frames] + [self.min_rms])
+        return [segment for segment in map(self._add_frame, frames) if segment is not None]
+
+    def flush(self):
+        """Closes the open segment at end of input."""
+        closed = self._end_warmup() if self.noise_floor is None else []
+        if self._buffer:
+            self._buffer, frame = b"", self._buffer
+            if self._frames:
+                self._frames.append(frame)
+        return closed + [segment for segment in [self._close()] if segment is not None]
+
+    def _is_speech(self, energy):
+        threshold = max(self.min_rms, self.noise_floor * self.ratio)
+        speech = energy > threshold
+        if not speech:
+            # Track the floor quickly downwards and slowly upwards.
+            weight = 0.5 if energy < self.noise_floor else 0.05
+            self.noise_floor += (energy - self.noise_floor) * weight
+        return speech
+
+    def _add_frame(self, frame):
+        energy = _rms(frame)
+        speech = self._is_speech(energy)
+        self._frame_no += 1
+        if not self._frames:
+            if not speech:
+                self._preroll.append(frame)
+                return None
+            self._frames = list(self._preroll) + [frame]
+            self._start_frame = self._frame_no - len(self._frames)
+            self._preroll.clear()
+            self._speech_frames, self._silent_run = 1, 0
+            self._quietest = energy
+            return None
+
+        self._frames.append(frame)
+        self._quietest = min(self._quietest, energy)
+        if speech:
+            self._speech_frames += 1
+            self._silent_run = 0
+        else:
+            self._silent_run += 1
+        if self._silent_run >= self.silence_frames:
+            return self._close()
+        if len(self._frames) >= self.max_frames:
+            # No pause in a whole segment: the floor is below the room's noise.
+            self.noise_floor = max(self.noise_floor, self._quietest)
+            return self._close()
+        return None
+
+    def _close(self):
+        frames, speech_frames = self._frames, self._speech_frames
+        self._frames, self._speech_frames, self._silent_run = [], 0, 0
+        if speech_frames < self.min_speech_frames:
+            return None
+        start_ms = self._start_frame * self.frame_ms
+        segment = Segment(self.segments, b"".join(frames), self.rate,
+                          start_ms, start_ms + len(frames) * self.frame_ms)
+        self.segments += 1
+        return segment
+
+
+# --- Recognition and speech synthesis ---
+
+def whisper_recognizer(model="base", language="english"):
+    """recognize(pcm, rate) backed by speech_recognition's local Whisper."""
+    import speech_recognition as sr
+
+    recognizer = sr.Recognizer()
+
+    def recognize(pcm, rate):
+        try:
+            return recognizer.recognize_whisper(sr.AudioData(pcm, rate, SAMPLE_WIDTH),
+                                                model=model, language=language)
+        except sr.UnknownValueError:
+            return ""
+
+    return recognize
+
+
+def synthesize_mp3(text, lang):
+    """gTTS speech for `text` as MP3 bytes, written to memory rather than a file."""
+    from gtts import gTTS
+
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=lang).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+def play_mp3(data):
+    """Pipes MP3 bytes to ffplay or mpg123 on stdin; returns False if neither is installed."""
+    for player in (["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-"], ["mpg123", "-q", "-"]):
+        if shutil.which(player[0]):
+            subprocess.run(player, input=data, check=False)
+            return True
+    return False
+
+
+# --- Pipeline ---
+
+class VoicePipeline:
+    """
+    Runs segments through recognize -> (translate -> postprocess ->
+    synthesize) per language. Recognition runs on its own thread in segment
+    order; translation and synthesis for all languages of a segment run on
+    a shared pool, so a slow language doesn't hold up the next segment's
+    recognition. `run` yields events in segment order.
+    """
+
+    def __init__(self, recognize, translate, languages, source_lang="en",
+                 synthesize=synthesize_mp3, postprocess=None, max_workers=None, segmenter_options=None):
+        self.recognize = recognize
+        self.translate = translate
+        self.languages = list(languages)
+        self.source_lang = source_lang
+        self.synthesize = synthesize
+        self.postprocess = postprocess
+        self.segmenter_options = segmenter_options or {}
+        self._asr_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice-asr")
+        self._lang_executor = ThreadPoolExecutor(max_workers=max_workers or 2 * len(self.languages),
+                                                 thread_name_prefix="voice-lang")
+
+    def _transcribe(self, segment):
+        started = time.perf_counter()
+        segment.text = (self.recognize(segment.pcm, segment.rate) or "").strip()
+        segment.asr_ms = round((time.perf_counter() - started) * 1000, 2)
+        if segment.text:
+            segment.outputs = {lang: self._lang_executor.submit(self._speak, segment, lang)
+                               for lang in self.languages}
+        return segment
+
+    def _speak(self, segment, lang):
+        started = time.perf_counter()
+        translated = self.translate(segment.text, self.source_lang, lang)
+        if self.postprocess is not None:
+            translated = self.postprocess(translated, lang)
+        translated_at = time.perf_counter()
+        audio = self.synthesize(translated, lang) if self.synthesize else None
+        done = time.perf_counter()
+        return {
+            "event": "translation",
+            "index": segment.index,
+            "lang": lang,
+            "text": translated,
+            "audio": audio,
+            "timings": {"mtMs": round((translated_at - started) * 1000, 2),
+                        "ttsMs": round((done - translated_at) * 1000, 2)},
+            "latencyMs": round((done - segment.closed_at) * 1000, 2),
+        }
+
+    def run(self, chunks, rate):
+        segmenter = SpeechSegmenter(rate, **self.segmenter_options)
+        started = time.perf_counter()
+        pending = deque()
+        transcript = []
+        stages = {"asrMs": [], "mtMs": [], "ttsMs": [], "latencyMs": []}
+        first_audio_ms = None
+
+        def ready(block):
+            # Emits finished work for the oldest segments, stopping at the first
+            # unfinished one so events stay in segment order.
+            nonlocal first_audio_ms
+            while pending:
+                future, emitted = pending[0]
+                if not block and not future.done():
+                    return
+                segment = future.result()
+                if not emitted:
+                    pending[0] = (future, True)
+                    if segment.text:
+                        transcript.append(segment.text)
+                        stages["asrMs"].append(segment.asr_ms)
+                    yield {"event": "partial", "index": segment.index, "text": segment.text,
+                           "transcript": " ".join(transcript), "startMs": segment.start_ms,
+                           "endMs": segment.end_ms, "timings": {"asrMs": segment.asr_ms}}
+                for lang in list(segment.outputs):
+                    output = segment.outputs[lang]
+                    if not block and not output.done():
+                        return
+                    try:
+                        result = output.result()
+                    except Exception as e:
+                        print(f"Voice pipeline error ({lang}): {e}")
+                        result = {"event": "error", "index": segment.index, "lang": lang, "error": str(e)}
+                    else:
+                        stages["mtMs"].append(result["timings"]["mtMs"])
+                        stages["ttsMs"].append(result["timings"]["ttsMs"])
+                        stages["latencyMs"].append(result["latencyMs"])
+                        if first_audio_ms is None:
+                            first_audio_ms = round((time.perf_counter() - started) * 1000, 2)
+                    del segment.outputs[lang]
+                    yield result
+                pending.popleft()
+
+        for chunk in chunks:
+            for segment in segmenter.feed(chunk):
+                pending.append((self._asr_executor.submit(self._transcribe, segment), False))
+            yield from ready(block=False)
+        for segment in segmenter.flush():
+            pending.append((self._asr_executor.submit(self._transcribe, segment), False))
+        yield from ready(block=True)
+
+        yield {
+            "event": "done",
+            "transcript": " ".join(transcript),
+            "segments": segmenter.segments,
+            "firstAudioMs": first_audio_ms,
+            "totalMs": round((time.perf_counter() - started) * 1000, 2),
+            "stages": {stage: _summary(values) for stage, values in stages.items()},
+        }
+
+    def close(self):
+        self._asr_executor.shutdown(wait=False)
+        self._lang_executor.shutdown(wait=False)
+
+
+def _summary(values):
+    if not values:
+        return None
+    values = sorted(values)
+    return {"count": len(values), "meanMs": round(sum(values) / len(values), 2),
+            "p50Ms": values[len(values) // 2], "maxMs": values[-1]}